@@ -1,27 +1,39 @@
+import time
+
+_PROCESS_STARTED = time.perf_counter()
+
+import argparse
 import json
 import os
 import queue
 import re
+import subprocess
 import threading
 import sys
-import urllib.request
-import urllib.error
-import webbrowser
-import subprocess
 from pathlib import Path
-from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from PIL import Image, ImageTk
-
-from assets import load_logo_image, load_logo_pil_image
-from config import base_dir, load_config
+from assets import load_logo_image, load_logo_pil_image, resolve_path
+from clip_filter import IncrementalFilter
+from config import base_dir, config_int, load_config
+from frame_atlas import build_rotation_atlas, build_sequence_atlas, load_atlas_frames, read_atlas_meta
+from job_queue import JobQueue, queue_path_from_config
 from version import __version__
-from ffmpeg_utils import ensure_ffmpeg
-from file_ops import build_folder_structure, copy_selected_files, stitch_ms_files
+from pipeline import (
+    build_ms_filename,
+    build_payload,
+    ensure_mp4_extension,
+    is_off_week_folder,
+    next_saturday_mmdd,
+    resolve_dest,
+    run_job,
+)
 from settings_manager import load_settings, save_settings
-from ui_helpers import enable_mousewheel
+from source_index import SourceIndex, index_path_from_config
+from source_watcher import SourceWatcher
+from startup_profile import PROFILE_FILENAME, StartupProfiler
+from ui_helpers import CheckList, debounce, enable_mousewheel, run_in_background
 from ui_style import (
     BASE_PAD,
     COLOR_ACCENT,
@@ -36,34 +48,6 @@ from ui_style import (
 )
 
 
-# ---------------------------------------------------------
-# FILENAME HELPERS
-# ---------------------------------------------------------
-def build_ms_filename(date_text, initials):
-    date_part = date_text.strip()
-    initials_part = initials.strip()
-    if not date_part or not initials_part:
-        return ""
-    return f"Main_PSA_{date_part}_MS_1920x1080_H.264_{initials_part}.mp4"
-
-
-def ensure_mp4_extension(name: str) -> str:
-    if not name:
-        return ""
-    if name.lower().endswith(".mp4"):
-        return name
-    return f"{name}.mp4"
-
-
-def apply_variant_name(base_filename: str, name_token: str) -> str:
-    token = name_token.strip() or "MS"
-    if "_MS_" in base_filename:
-        return base_filename.replace("_MS_", f"_{token}_")
-    root, ext = os.path.splitext(base_filename)
-    ext = ext or ".mp4"
-    return f"{root}_{token}{ext}"
-
-
 def _parse_version(value: str):
     if not value:
         return ()
@@ -103,19 +87,30 @@ def load_update_token(app_config):
     return ""
 
 
-def fetch_latest_release(repo: str, token: str):
-    if not repo:
-        return None
-    url = f"https://api.github.com/repos/{repo}/releases/latest"
-    headers = {"User-Agent": "PSA-Tool"}
-    if token:
-        headers["Authorization"] = f"token {token}"
+UPDATE_CACHE_FILENAME = "update_cache.json"
+
+
+def _load_update_cache(repo: str) -> dict:
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
+        with open(base_dir() / UPDATE_CACHE_FILENAME, "r", encoding="utf-8") as f:
+            cache = json.load(f)
     except Exception:
-        return None
+        return {}
+    if not isinstance(cache, dict) or cache.get("repo") != repo:
+        return {}
+    return cache
+
+
+def _save_update_cache(cache: dict) -> None:
+    try:
+        with open(base_dir() / UPDATE_CACHE_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=4)
+    except Exception:
+        pass
+
+
+def _parse_release(repo: str, data: dict):
+    from delta_update import delta_from_version
 
     tag = data.get("tag_name", "")
     body = data.get("body", "") or ""
@@ -124,39 +119,131 @@ def fetch_latest_release(repo: str, token: str):
     asset = next((a for a in assets if str(a.get("name", "")).lower().endswith(".exe")), None)
     download_url = asset.get("browser_download_url") if asset else None
     size = asset.get("size") if asset else None
+    # GitHub publishes "sha256:<hex>" digests for release assets.
+    digest = str(asset.get("digest") or "") if asset else ""
+    sha256 = digest.split(":", 1)[1] if digest.startswith("sha256:") else ""
+    # Patches from earlier versions, keyed by the version they apply to.
+    deltas = {}
+    for item in assets:
+        from_version = delta_from_version(str(item.get("name", "")))
+        if from_version and item.get("browser_download_url"):
+            deltas[from_version] = {"url": item["browser_download_url"], "size": item.get("size")}
     return {
         "tag": tag,
         "body": body,
         "html_url": html_url,
         "download_url": download_url,
         "size": size,
+        "sha256": sha256,
+        "deltas": deltas,
     }
 
 
-def download_file(url: str, dest_path: Path, token: str, on_progress=None):
+def fetch_latest_release(repo: str, token: str, min_interval_hours: float = 0):
+    """Latest release info, revalidated against GitHub at most every min_interval_hours.
+
+    The last answer is kept in UPDATE_CACHE_FILENAME with its ETag and
+    Last-Modified. A 304 Not Modified reuses it without re-reading the body and
+    does not count against the API rate limit.
+    """
+    if not repo:
+        return None
+    import urllib.error
+    import urllib.request
+
+    cache = _load_update_cache(repo)
+    cached_release = cache.get("release")
+    now = time.time()
+    if cached_release and now - cache.get("checked_at", 0) < min_interval_hours * 3600:
+        return cached_release
+
+    url = f"https://api.github.com/repos/{repo}/releases/latest"
     headers = {"User-Agent": "PSA-Tool"}
     if token:
         headers["Authorization"] = f"token {token}"
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=30) as resp, open(dest_path, "wb") as out:
-        total = resp.headers.get("Content-Length")
-        total = int(total) if total and total.isdigit() else None
-        downloaded = 0
-        while True:
-            chunk = resp.read(1024 * 256)
-            if not chunk:
-                break
-            out.write(chunk)
-            downloaded += len(chunk)
-            if on_progress:
-                on_progress(downloaded, total)
-
-
-def next_saturday_mmdd():
-    today = datetime.today()
-    days_ahead = (5 - today.weekday()) % 7
-    target = today + timedelta(days=days_ahead)
-    return target.strftime("%m%d")
+    if cached_release:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+    try:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=8) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached_release:
+            cache["checked_at"] = now
+            _save_update_cache(cache)
+            return cached_release
+        return None
+    except Exception:
+        return None
+
+    release = _parse_release(repo, data)
+    _save_update_cache(
+        {
+            "repo": repo,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": now,
+            "release": release,
+        }
+    )
+    return release
+
+
+def download_file(
+    url: str, dest_path: Path, token: str, size=None, connections: int = 4, on_progress=None, expected_sha256=None
+):
+    from downloads import download_parallel
+
+    headers = {"Authorization": f"token {token}"} if token else {}
+    download_parallel(
+        url,
+        dest_path,
+        size,
+        on_progress=on_progress,
+        headers=headers,
+        connections=connections,
+        expected_sha256=expected_sha256,
+    )
+
+
+def download_delta_update(release, exe_path: Path, tmp_path: Path, token: str, on_progress=None) -> bool:
+    """Build tmp_path from the running exe and a published patch, if there is one.
+
+    Returns False (leaving no tmp_path behind) when no patch targets this
+    version or anything fails, so the caller can fetch the full exe instead.
+    """
+    delta = (release.get("deltas") or {}).get(__version__)
+    # A half-finished full download is worth more than starting a patch.
+    if not delta or tmp_path.with_name(tmp_path.name + ".state").exists():
+        return False
+    from delta_update import apply_patch
+
+    # Named after the release so a leftover .part from another patch is never resumed.
+    tag = re.sub(r"[^\w.-]", "_", str(release.get("tag") or ""))
+    patch_path = tmp_path.with_name(f"{exe_path.stem}_{tag}.delta")
+    try:
+        download_file(delta["url"], patch_path, token, size=delta.get("size"), connections=1, on_progress=on_progress)
+        apply_patch(exe_path, patch_path, tmp_path)
+        if release.get("size") and tmp_path.stat().st_size != release["size"]:
+            raise RuntimeError("Patched exe has the wrong size.")
+        return True
+    except Exception:
+        for path in (tmp_path, patch_path.with_name(patch_path.name + ".part")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return False
+    finally:
+        try:
+            patch_path.unlink()
+        except OSError:
+            pass
 
 
 def normalize_path(value: str) -> str:
@@ -174,20 +261,12 @@ def normalize_path(value: str) -> str:
     return value
 
 
-_OFF_WEEK_PATTERN = re.compile(r"\boff[\s_-]*(week|wk)s?\b", re.IGNORECASE)
-
-
-def is_off_week_folder(name: str) -> bool:
-    """Return True when the destination folder name indicates an off week."""
-    if not name:
-        return False
-    return _OFF_WEEK_PATTERN.search(name) is not None
-
-
 ANIMATION_FILE = Path("animations") / "logo_load_animation.json"
 ANIMATION_FRAMES_DIR = Path("animations") / "Frames" / "LoadLogoAnimimation"
 ANIMATION_FPS = 24
 ANIMATION_SIZE = 64
+ANIMATION_ATLAS = Path("animations") / "LoadLogoAnimimation_64.png"
+ANIMATION_CACHE_DIR = Path("cache")
 
 
 def resource_path(rel_path: Path) -> Path:
@@ -246,60 +325,82 @@ def _load_animation_spec():
     }
 
 
+def _animation_atlas(logo_path: str):
+    """Return (png_path, meta) for the busy animation sprite sheet.
+
+    Uses the sheet baked at build time when the source frames are not
+    shipped, otherwise a sheet cached under ANIMATION_CACHE_DIR keyed by the
+    source files' size and mtime, rebuilding it (Pillow needed) when stale.
+    """
+    frames_dir = resource_path(ANIMATION_FRAMES_DIR)
+    frame_files = sorted(p for p in frames_dir.glob("*.png") if p.is_file()) if frames_dir.exists() else []
+    if not frame_files:
+        bundled = resource_path(ANIMATION_ATLAS)
+        meta = read_atlas_meta(bundled)
+        if meta:
+            return bundled, meta
+
+    cache_png = base_dir() / ANIMATION_CACHE_DIR / ANIMATION_ATLAS.name
+    if frame_files:
+        return cache_png, build_sequence_atlas(frame_files, ANIMATION_SIZE, cache_png, ANIMATION_FPS)
+
+    spec = _load_animation_spec()
+    angles = spec["angles"] if spec else [0.0]
+    fps = spec["fps"] if spec else 24.0
+    key_paths = [resource_path(ANIMATION_FILE)] if resource_path(ANIMATION_FILE).exists() else []
+    image_path = spec["image_path"] if spec and spec.get("image_path") and spec["image_path"].exists() else None
+    logo_file = resolve_path(logo_path) if logo_path else None
+    if image_path:
+        key_paths.append(image_path)
+    elif logo_file and logo_file.is_file():
+        key_paths.append(logo_file)
+
+    def _load_image():
+        # Only called when the cached sheet is stale, so warm starts skip Pillow and the decode.
+        if image_path:
+            try:
+                from PIL import Image
+
+                return Image.open(image_path).convert("RGBA")
+            except Exception:
+                pass
+        return load_logo_pil_image(logo_path)
+
+    rotation_png = cache_png.with_name("logo_rotation_64.png")
+    return rotation_png, build_rotation_atlas(_load_image, key_paths, angles, ANIMATION_SIZE, rotation_png, fps)
+
+
 class AnimatedLogo:
     def __init__(self, parent, logo_path: str):
         self._label = tk.Label(parent, bg=COLOR_BG)
         self._label.pack(side="left")
+        self._logo_path = logo_path
         self._frames = []
+        self._loaded = False
         self._index = 0
         self._after_id = None
         self._delay_ms = 100
-        self._load_frames(logo_path)
-
-    def _load_frames(self, logo_path: str):
-        frames_dir = resource_path(ANIMATION_FRAMES_DIR)
-        if frames_dir.exists():
-            frame_files = sorted(p for p in frames_dir.glob("*.png") if p.is_file())
-            if frame_files:
-                self._delay_ms = max(10, int(1000 / ANIMATION_FPS))
-                for frame_path in frame_files:
-                    try:
-                        image = Image.open(frame_path).convert("RGBA")
-                    except Exception:
-                        continue
-                    image = image.resize((ANIMATION_SIZE, ANIMATION_SIZE), Image.LANCZOS)
-                    self._frames.append(ImageTk.PhotoImage(image))
-                if self._frames:
-                    self._label.configure(image=self._frames[0])
-                    return
-
-        spec = _load_animation_spec()
-        angles = spec["angles"] if spec else [0.0]
-        fps = spec["fps"] if spec else 24.0
-        self._delay_ms = max(10, int(1000 / max(1.0, fps)))
 
-        image = None
-        if spec and spec.get("image_path") and spec["image_path"].exists():
-            try:
-                image = Image.open(spec["image_path"]).convert("RGBA")
-            except Exception:
-                image = None
-
-        if image is None:
-            image = load_logo_pil_image(logo_path)
-
-        if image is None:
+    def _load_frames(self):
+        # Deferred to the first start() so startup never decodes the animation.
+        self._loaded = True
+        try:
+            png_path, meta = _animation_atlas(self._logo_path)
+        except Exception:
             return
-
-        image = image.resize((ANIMATION_SIZE, ANIMATION_SIZE), Image.LANCZOS)
-        self._frames = [
-            ImageTk.PhotoImage(image.rotate(-angle, resample=Image.BICUBIC, expand=True))
-            for angle in angles
-        ]
+        if meta is None:
+            return
+        self._delay_ms = max(10, int(1000 / max(1.0, float(meta["fps"]))))
+        try:
+            self._frames = load_atlas_frames(self._label, png_path, meta)
+        except Exception:
+            self._frames = []
         if self._frames:
             self._label.configure(image=self._frames[0])
 
     def start(self):
+        if not self._loaded:
+            self._load_frames()
         if not self._frames or self._after_id is not None:
             return
         self._tick()
@@ -351,9 +452,12 @@ def open_settings_window(root, source_var, dest_root_var, app_config, settings,
 # ---------------------------------------------------------
 # MAIN GUI
 # ---------------------------------------------------------
-def run_gui():
+def run_gui(profile_startup: bool = False):
+    profiler = StartupProfiler(profile_startup, started=_PROCESS_STARTED)
+    profiler.mark("imports")
     app_config = load_config()
     settings = load_settings(app_config)
+    profiler.mark("config + settings")
 
     root = tk.Tk()
     root.title(f"PSA File Drop Utility v{__version__}")
@@ -361,6 +465,7 @@ def run_gui():
     root.configure(bg=COLOR_BG)
 
     apply_styles(root)
+    profiler.mark("tk root + styles")
     style = ttk.Style(root)
     style.configure("Blue.Horizontal.TProgressbar", background=COLOR_ACCENT, troughcolor=COLOR_CARD)
 
@@ -371,7 +476,12 @@ def run_gui():
 
         def _worker():
             token = load_update_token(app_config)
-            release = fetch_latest_release(repo, token)
+            interval = app_config.get("update_check_interval_hours", 4)
+            try:
+                interval = float(interval)
+            except (TypeError, ValueError):
+                interval = 4
+            release = fetch_latest_release(repo, token, min_interval_hours=interval)
             if not release or not release.get("tag"):
                 return
 
@@ -424,6 +534,8 @@ def run_gui():
         btn_row.pack(fill="x", padx=BASE_PAD, pady=(0, BASE_PAD))
 
         def open_release_page():
+            import webbrowser
+
             try:
                 webbrowser.open(release.get("html_url", ""))
             except Exception:
@@ -461,16 +573,26 @@ def run_gui():
             def _progress(downloaded, total):
                 if total:
                     percent = int((downloaded / total) * 100)
-                    progress_var.set(percent)
+                    root.after(0, progress_var.set, percent)
 
             def _download_worker():
+                # A .new left by an interrupted attempt is resumed, not discarded.
                 try:
-                    if tmp_path.exists():
-                        tmp_path.unlink()
-                    download_file(download_url, tmp_path, token, on_progress=_progress)
+                    if not download_delta_update(release, exe_path, tmp_path, token, on_progress=_progress):
+                        download_file(
+                            download_url,
+                            tmp_path,
+                            token,
+                            size=release.get("size"),
+                            connections=config_int(app_config, "update_download_connections", 4),
+                            on_progress=_progress,
+                            expected_sha256=release.get("sha256") or None,
+                        )
                 except Exception as e:
+                    message = f"Download failed: {e}"
+
                     def _fail():
-                        status_var.set(f"Download failed: {e}")
+                        status_var.set(message)
                         btn_open.config(state="normal")
                         btn_later.config(state="normal")
                     root.after(0, _fail)
@@ -503,8 +625,10 @@ del "%~f0"
                 try:
                     updater_path.write_text(script, encoding="utf-8")
                 except Exception as e:
+                    message = f"Update failed: {e}"
+
                     def _fail():
-                        status_var.set(f"Update failed: {e}")
+                        status_var.set(message)
                         btn_open.config(state="normal")
                         btn_later.config(state="normal")
                     root.after(0, _fail)
@@ -516,8 +640,10 @@ del "%~f0"
                         creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
                     )
                 except Exception as e:
+                    message = f"Update failed: {e}"
+
                     def _fail():
-                        status_var.set(f"Update failed: {e}")
+                        status_var.set(message)
                         btn_open.config(state="normal")
                         btn_later.config(state="normal")
                     root.after(0, _fail)
@@ -570,7 +696,9 @@ del "%~f0"
         logo_label.pack(anchor="w", pady=(0, BASE_PAD))
 
     ttk.Label(container, text="PSA Utility", style="Heading.TLabel").pack(anchor="w", pady=(0, BASE_PAD))
-    ttk.Label(container, text="Organize RS + stitch MS assets", style="App.TLabel", foreground=COLOR_MUTED).pack(anchor="w", pady=(0, BASE_PAD * 2))
+    ttk.Label(container, text="Organize RS + stitch MS assets", style="App.TLabel", foreground=COLOR_MUTED).pack(anchor="w", pady=(0, BASE_PAD))
+    scan_status_var = tk.StringVar(value="")
+    ttk.Label(container, textvariable=scan_status_var, style="App.TLabel", foreground=COLOR_MUTED).pack(anchor="w", pady=(0, BASE_PAD))
 
     # Destination path
     dest_root_var = tk.StringVar(value=normalize_path(settings.get("dest_root", app_config.get("default_dest_root", ""))))
@@ -604,6 +732,8 @@ del "%~f0"
         command=lambda: open_settings_window(root, source_var, dest_root_var, app_config, settings, on_save=refresh_all_lists),
     ).pack(anchor="w", pady=(0, BASE_PAD))
 
+    profiler.mark("header + destination widgets")
+
     # ---------- RS SECTION ----------
     rs_card = ttk.Frame(container, style="Card.TFrame", padding=BASE_PAD * 2)
     rs_card.pack(fill="x", expand=False, pady=(0, BASE_PAD * 2))
@@ -614,6 +744,7 @@ del "%~f0"
     ttk.Button(rs_header, text="Refresh Segments", command=lambda: refresh_all_lists(), style="TButton").pack(side="right")
 
     search_var = tk.StringVar()
+    search_debounce_ms = max(0, config_int(app_config, "search_debounce_ms", 200))
     rs_search_row = ttk.Frame(rs_card, style="Card.TFrame")
     rs_search_row.pack(fill="x", pady=(0, BASE_PAD))
     ttk.Entry(rs_search_row, textvariable=search_var, width=40, style="App.TEntry").pack(side="left", fill="x", expand=True)
@@ -622,25 +753,20 @@ del "%~f0"
     rs_content_row = ttk.Frame(rs_card, style="Card.TFrame")
     rs_content_row.pack(fill="both", expand=True)
 
-    rs_frame = tk.Frame(rs_content_row, bg=COLOR_CARD)
-    rs_frame.pack(side="left", fill="both", expand=True)
-
-    rs_canvas = tk.Canvas(rs_frame, bg=COLOR_CARD, highlightthickness=0)
-    rs_canvas.pack(side="left", fill="both", expand=True)
+    rs_selected_set = set()
+    rs_list = CheckList(rs_content_row, rs_selected_set, on_toggle=lambda *_: update_rs_selected_display())
+    rs_list.frame.pack(side="left", fill="both", expand=True)
 
-    rs_scrollbar = ttk.Scrollbar(rs_frame, orient="vertical", command=rs_canvas.yview)
-    rs_scrollbar.pack(side="right", fill="y")
+    source_index = SourceIndex(index_path_from_config(app_config))
+    scan_state = {"generation": 0, "pending": True}
+    scan_timeout_ms = max(1, config_int(app_config, "scan_timeout_sec", 10)) * 1000
 
-    rs_canvas.configure(yscrollcommand=rs_scrollbar.set)
-    rs_canvas.bind("<Configure>", lambda e: rs_canvas.configure(scrollregion=rs_canvas.bbox("all")))
+    def _list_rs_items():
+        return source_index.items(source_var.get(), "rs")
 
-    list_frame = tk.Frame(rs_canvas, bg=COLOR_CARD)
-    rs_canvas.create_window((0, 0), window=list_frame, anchor="nw")
-    enable_mousewheel(rs_canvas, rs_canvas)
-    enable_mousewheel(list_frame, rs_canvas)
+    def _list_ms_items():
+        return source_index.items(source_var.get(), "ms")
 
-    rs_selected_set = set()
-    rs_checkbuttons = []
     rs_selected_display_var = tk.StringVar(value="(none)")
 
     rs_selected_box = ttk.Frame(rs_content_row, style="Card.TFrame", width=220)
@@ -655,57 +781,26 @@ del "%~f0"
         rs_selected_display_var.set("\n".join(sorted(rs_selected_set)))
 
     def load_file_list(filter_text=""):
-        for widget in list_frame.winfo_children():
-            widget.destroy()
-        rs_checkbuttons.clear()
-
-        source_path = source_var.get()
-        if not os.path.isdir(source_path):
-            tk.Label(list_frame, text="Invalid source folder", bg=COLOR_CARD, fg=COLOR_TEXT).pack()
+        items = _list_rs_items()
+        if items is None:
+            rs_list.show_message("Loading..." if scan_state["pending"] else "Invalid source folder")
             return
 
-        items = [f[:-4] for f in os.listdir(source_path) if f.lower().endswith(".mov")]
-        items = sorted(items)
-
-        for item in items:
-            if filter_text.lower() in item.lower():
-                var = tk.BooleanVar()
-                if item in rs_selected_set:
-                    var.set(True)
-
-                def on_toggle(n=item, v=var):
-                    if v.get():
-                        rs_selected_set.add(n)
-                    else:
-                        rs_selected_set.discard(n)
-                    update_rs_selected_display()
-
-                chk = tk.Checkbutton(
-                    list_frame,
-                    text=item,
-                    variable=var,
-                    command=on_toggle,
-                    bg=COLOR_CARD,
-                    fg=COLOR_TEXT,
-                    selectcolor=COLOR_CARD,
-                    activebackground=COLOR_CARD,
-                    activeforeground=COLOR_TEXT,
-                )
-                chk.var = var
-                chk.name = item
-                chk.pack(anchor="w", pady=2)
-                rs_checkbuttons.append(chk)
-
+        rs_list.set_items(items)
+        rs_filter.set_items(items)
+        rs_list.show_only(rs_filter.filter(filter_text))
         update_rs_selected_display()
 
     def clear_rs_selection():
         rs_selected_set.clear()
-        for chk in rs_checkbuttons:
-            chk.var.set(False)
+        rs_list.refresh_marks()
         update_rs_selected_display()
 
+    rs_filter = IncrementalFilter()
     load_file_list()
-    search_var.trace_add("write", lambda *args: load_file_list(search_var.get()))
+    search_var.trace_add("write", debounce(root, search_debounce_ms, lambda: load_file_list(search_var.get())))
+
+    profiler.mark("RS section")
 
     # ---------- MS SECTION ----------
     ms_card = ttk.Frame(container, style="Card.TFrame", padding=BASE_PAD * 2)
@@ -719,26 +814,11 @@ del "%~f0"
     ttk.Entry(ms_search_row, textvariable=ms_search_var, width=40, style="App.TEntry").pack(side="left", fill="x", expand=True)
     ttk.Button(ms_search_row, text="Clear Selection", command=lambda: clear_ms_selection(), style="TButton").pack(side="right", padx=(BASE_PAD, 0))
 
-    ms_frame = tk.Frame(ms_card, bg=COLOR_CARD)
-    ms_frame.pack(fill="both", expand=True)
-
-    ms_canvas = tk.Canvas(ms_frame, bg=COLOR_CARD, highlightthickness=0)
-    ms_canvas.pack(side="left", fill="both", expand=True)
-
-    ms_scrollbar = ttk.Scrollbar(ms_frame, orient="vertical", command=ms_canvas.yview)
-    ms_scrollbar.pack(side="right", fill="y")
-
-    ms_canvas.configure(yscrollcommand=ms_scrollbar.set)
-    ms_canvas.bind("<Configure>", lambda e: ms_canvas.configure(scrollregion=ms_canvas.bbox("all")))
-
-    ms_list_frame = tk.Frame(ms_canvas, bg=COLOR_CARD)
-    ms_canvas.create_window((0, 0), window=ms_list_frame, anchor="nw")
-    enable_mousewheel(ms_canvas, ms_canvas)
-    enable_mousewheel(ms_list_frame, ms_canvas)
-
     ms_selection_order = []
     ms_selected_set = set()
-    ms_checkbuttons = []
+    ms_list = CheckList(ms_card, ms_selected_set, on_toggle=lambda name, checked: on_ms_toggle(name, checked))
+    ms_list.frame.pack(fill="both", expand=True)
+
     ms_variants = []  # each: {"name_var": StringVar, "order": list}
     ms_add_target_idx = None
     ms_order_label_var = tk.StringVar(value="Order: (none)")
@@ -754,11 +834,11 @@ del "%~f0"
         else:
             ms_order_label_var.set("Order: " + " -> ".join(ms_selection_order))
 
-    def on_ms_toggle(name, var):
-        if var.get():
+    def on_ms_toggle(name, checked):
+        if checked:
             if name not in ms_selection_order:
                 ms_selection_order.append(name)
-                ms_selected_set.add(name)
+            ms_selected_set.add(name)
         else:
             if name in ms_selection_order:
                 ms_selection_order.remove(name)
@@ -768,8 +848,7 @@ del "%~f0"
     def clear_ms_selection():
         ms_selection_order.clear()
         ms_selected_set.clear()
-        for chk in ms_checkbuttons:
-            chk.var.set(False)
+        ms_list.refresh_marks()
         update_ms_order_label()
 
     def add_ms_variant():
@@ -912,58 +991,23 @@ del "%~f0"
             ttk.Button(row, text="Delete", command=lambda i=idx: delete_ms_variant(i), style="TButton").pack(side="right")
 
     def load_ms_list(filter_text=""):
-        for widget in ms_list_frame.winfo_children():
-            widget.destroy()
-        ms_checkbuttons.clear()
-
-        source_path = source_var.get()
-        source_ms = os.path.join(source_path, "MS")
-        if not os.path.isdir(source_ms):
-            tk.Label(ms_list_frame, text="Invalid MS folder (expecting /MS with MP4s)", bg=COLOR_CARD, fg=COLOR_TEXT).pack()
+        items = _list_ms_items()
+        if items is None:
+            ms_list.show_message("Loading..." if scan_state["pending"] else "Invalid MS folder (expecting /MS with MP4s)")
             return
 
-        items = [f[:-4] for f in os.listdir(source_ms) if f.lower().endswith(".mp4")]
-        items = sorted(items)
-
-        for item in items:
-            if filter_text.lower() in item.lower():
-                var = tk.BooleanVar()
-                if item in ms_selected_set:
-                    var.set(True)
-                    if item not in ms_selection_order:
-                        ms_selection_order.append(item)
-                chk = tk.Checkbutton(
-                    ms_list_frame,
-                    text=item,
-                    variable=var,
-                    bg=COLOR_CARD,
-                    fg=COLOR_TEXT,
-                    selectcolor=COLOR_CARD,
-                    activebackground=COLOR_CARD,
-                    activeforeground=COLOR_TEXT,
-                    command=lambda n=item, v=var: on_ms_toggle(n, v),
-                )
-                chk.var = var
-                chk.name = item
-                chk.pack(anchor="w", pady=2)
-                ms_checkbuttons.append(chk)
+        ms_list.set_items(items)
+        ms_filter.set_items(items)
+        visible = ms_filter.filter(filter_text)
+        for item in visible:
+            if item in ms_selected_set and item not in ms_selection_order:
+                ms_selection_order.append(item)
+        ms_list.show_only(visible)
         update_ms_order_label()
 
+    ms_filter = IncrementalFilter()
     load_ms_list()
-    ms_search_var.trace_add("write", lambda *args: load_ms_list(ms_search_var.get()))
-
-    def _list_rs_items():
-        source_path = source_var.get()
-        if not os.path.isdir(source_path):
-            return None
-        return sorted([f[:-4] for f in os.listdir(source_path) if f.lower().endswith(".mov")])
-
-    def _list_ms_items():
-        source_path = source_var.get()
-        source_ms = os.path.join(source_path, "MS")
-        if not os.path.isdir(source_ms):
-            return None
-        return sorted([f[:-4] for f in os.listdir(source_ms) if f.lower().endswith(".mp4")])
+    ms_search_var.trace_add("write", debounce(root, search_debounce_ms, lambda: load_ms_list(ms_search_var.get())))
 
     def _prune_missing_selections():
         missing_sections = []
@@ -998,10 +1042,56 @@ del "%~f0"
         return missing_sections
 
     def refresh_all_lists():
+        # Folder scans run on a worker thread; only the newest scan is applied.
+        scan_state["generation"] += 1
+        scan_state["pending"] = True
+        generation = scan_state["generation"]
+        source = source_var.get()
+        root_path = dest_root_var.get().strip()
+        scan_status_var.set("Scanning folders...")
+
+        source_watcher.set_source(source)
+
+        def _scan():
+            source_index.refresh(source)
+            return _list_dest_subdirs(root_path)
+
+        def _timeout():
+            if generation == scan_state["generation"]:
+                scan_status_var.set("Folders are not responding; showing the last known lists.")
+
+        def _done(subdirs, error):
+            if generation != scan_state["generation"]:
+                return
+            scan_state["pending"] = False
+            scan_status_var.set(f"Folder scan failed: {error}" if error else "")
+            apply_dest_options(None if error else subdirs)
+            apply_refreshed_lists()
+
+        run_in_background(root, _scan, _done, timeout_ms=scan_timeout_ms, on_timeout=_timeout)
+
+    def apply_source_changes(source, diffs):
+        if source != source_var.get() or scan_state["pending"]:
+            return
+        added = sum(len(diff["added"]) for diff in diffs.values())
+        removed = sum(len(diff["removed"]) for diff in diffs.values())
+        scan_status_var.set(f"Source folder changed: {added} added, {removed} removed.")
+        apply_refreshed_lists()
+
+    source_watcher = SourceWatcher(
+        source_index,
+        on_change=lambda source, diffs: root.after(0, apply_source_changes, source, diffs),
+        interval=max(1, config_int(app_config, "watch_interval_sec", 5)),
+    )
+    if app_config.get("watch_source", True):
+        source_watcher.start()
+
+    def apply_refreshed_lists():
         missing_sections = _prune_missing_selections()
-        refresh_dest_options()
         load_file_list(search_var.get())
         load_ms_list(ms_search_var.get())
+        rs_list.refresh_marks()
+        ms_list.refresh_marks()
         render_ms_variants()
         if missing_sections:
             lines = ["Some selected clips were missing after refresh and were removed:"]
@@ -1060,6 +1150,8 @@ del "%~f0"
     ms_variants_frame = ttk.Frame(ms_card, style="Card.TFrame")
     ms_variants_frame.pack(fill="x", pady=(0, BASE_PAD))
 
+    profiler.mark("MS section")
+
     # ---------- DESTINATION + ACTION (BOTTOM) ----------
     ttk.Label(container, text="Destination Folder (full path):", style="App.TLabel").pack(anchor="w", pady=(BASE_PAD, BASE_PAD // 2))
     dest_path_var = tk.StringVar()
@@ -1069,9 +1161,37 @@ del "%~f0"
     dest_entry.pack(side="left", fill="x", expand=True, pady=0)
     open_btn = ttk.Button(dest_row, text="Open Folder", style="TButton")
     open_btn.pack(side="right", padx=(BASE_PAD, 0))
+    queue_btn = ttk.Button(dest_row, text="Add to Queue", style="TButton")
+    queue_btn.pack(side="right", padx=(BASE_PAD, 0))
     action_btn = ttk.Button(dest_row, text="Copy Files", style="Accent.TButton")
     action_btn.pack(side="right", padx=(BASE_PAD, 0))
 
+    # ---------- JOB QUEUE ----------
+    queue_card = ttk.Frame(container, style="Card.TFrame", padding=BASE_PAD * 2)
+    queue_card.pack(fill="x", expand=False, pady=(0, BASE_PAD))
+    queue_header = ttk.Frame(queue_card, style="Card.TFrame")
+    queue_header.pack(fill="x", pady=(0, BASE_PAD // 2))
+    ttk.Label(queue_header, text="Queue", style="Heading.TLabel").pack(side="left")
+    queue_clear_btn = ttk.Button(queue_header, text="Clear Finished", style="TButton")
+    queue_clear_btn.pack(side="right")
+    queue_retry_btn = ttk.Button(queue_header, text="Retry", style="TButton")
+    queue_retry_btn.pack(side="right", padx=(0, BASE_PAD // 2))
+    queue_remove_btn = ttk.Button(queue_header, text="Remove", style="TButton")
+    queue_remove_btn.pack(side="right", padx=(0, BASE_PAD // 2))
+    queue_tree = ttk.Treeview(
+        queue_card,
+        columns=("status", "progress"),
+        show="tree",
+        selectmode="browse",
+        height=4,
+        style="Card.Treeview",
+    )
+    queue_tree.column("#0", stretch=True)
+    queue_tree.column("status", width=120, stretch=False, anchor="w")
+    queue_tree.column("progress", width=60, stretch=False, anchor="e")
+    queue_tree.pack(fill="x")
+    profiler.mark("queue section")
+
     # ---------- PROGRESS + ACTION ----------
     action_frame = ttk.Frame(container, style="App.TFrame")
     action_frame.pack(side="bottom", fill="x", expand=False, pady=(BASE_PAD, BASE_PAD))
@@ -1182,18 +1302,18 @@ del "%~f0"
             full = os.path.join(root_path, choice, week_folder) if week_folder else os.path.join(root_path, choice)
         dest_path_var.set(normalize_path(full))
 
-    def refresh_dest_options():
-        root_path = dest_root_var.get().strip()
+    def _list_dest_subdirs(root_path):
         if not root_path or not os.path.isdir(root_path):
-            dest_combo["values"] = []
-            dest_var.set("")
-            dest_path_var.set("")
-            return
-        subdirs = [d for d in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, d))]
-        subdirs.sort()
-        dest_combo["values"] = subdirs
+            return None
+        return sorted(d for d in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, d)))
+
+    def apply_dest_options(subdirs, select_name=None):
+        dest_combo["values"] = subdirs or []
         if subdirs:
-            dest_combo.current(0)
+            if select_name in subdirs:
+                dest_var.set(select_name)
+            else:
+                dest_combo.current(0)
             apply_dest_selection()
         else:
             dest_var.set("")
@@ -1205,129 +1325,67 @@ del "%~f0"
     def create_new_folder():
         root_path = dest_root_var.get().strip()
         name = new_folder_var.get().strip()
-        if not root_path or not os.path.isdir(root_path):
+        if not root_path:
             messagebox.showerror("Error", "Enter a valid destination root path first.")
             return
         if not name:
             messagebox.showerror("Error", "Enter a folder name.")
             return
         new_path = os.path.join(root_path, name)
-        try:
+
+        def _create():
+            if not os.path.isdir(root_path):
+                raise ValueError("Enter a valid destination root path first.")
             os.makedirs(new_path, exist_ok=True)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not create folder: {e}")
-            return
-        refresh_dest_options()
-        if name in dest_combo["values"]:
-            dest_var.set(name)
-            apply_dest_selection()
-        new_folder_var.set("")
-        update_full_dest()
+            return _list_dest_subdirs(root_path)
+
+        def _done(subdirs, error):
+            scan_status_var.set("")
+            if isinstance(error, ValueError):
+                messagebox.showerror("Error", str(error))
+                return
+            if error:
+                messagebox.showerror("Error", f"Could not create folder: {error}")
+                return
+            apply_dest_options(subdirs, select_name=name)
+            new_folder_var.set("")
+            update_full_dest()
+
+        scan_status_var.set("Creating folder...")
+        run_in_background(
+            root,
+            _create,
+            _done,
+            timeout_ms=scan_timeout_ms,
+            on_timeout=lambda: scan_status_var.set("Destination root is not responding..."),
+        )
 
     dest_combo.bind("<<ComboboxSelected>>", apply_dest_selection)
     week_var.trace_add("write", lambda *_: update_full_dest())
 
     def execute_work(payload):
-        task_queue.put(("progress", 5))
-        try:
-            build_folder_structure(payload["dest"])
-        except Exception as e:
-            task_queue.put(("error", f"Could not prepare destination: {e}"))
-            task_queue.put(("done", None))
-            return
-
-        any_work = False
-        source = payload["source"]
-        dest = payload["dest"]
-
         try:
-            if payload["rs_selected"]:
-                any_work = True
-                task_queue.put(("activity", "Copying RS clips and music"))
-                task_queue.put(("log", "Copying RS clips and music..."))
-                copy_selected_files(dest, payload["rs_selected"], source)
-                task_queue.put(("log", "RS copy complete."))
-                task_queue.put(("progress", 40))
+            run_job(payload, lambda kind, value: task_queue.put((kind, value)))
         except Exception as e:
-            task_queue.put(("error", f"RS copy failed: {e}"))
+            task_queue.put(("error", f"Job failed: {e}"))
+        finally:
             task_queue.put(("done", None))
-            return
-
-        try:
-            if payload["ms_variants"]:
-                task_queue.put(("activity", "Stitching MS clips"))
-                task_queue.put(("progress", 60))
-                ffmpeg_path = ensure_ffmpeg(payload["ffmpeg_names"], payload["ffmpeg_download_url"])
-                for variant in payload["ms_variants"]:
-                    order_list = variant["order"]
-                    if not order_list:
-                        continue
-                    name_token = variant["name"] or "MS"
-                    filename = apply_variant_name(payload["base_filename"], name_token)
-                    any_work = True
-                    task_queue.put(("log", f"Stitching MS clips ({name_token})..."))
-                    output_path = stitch_ms_files(dest, order_list, source, filename, ffmpeg_path)
-                    task_queue.put(("log", f"MS stitch complete: {output_path}"))
-                task_queue.put(("progress", 80))
-        except Exception as e:
-            task_queue.put(("error", f"MS stitch failed: {e}"))
-            task_queue.put(("done", None))
-            return
-
-        if not any_work:
-            task_queue.put(("info", "No RS or MS selections to process."))
-            task_queue.put(("done", None))
-            return
-
-        task_queue.put(("progress", 100))
-        task_queue.put(("log", "All operations complete."))
-        task_queue.put(("info", "RS copy and MS stitch complete."))
-        task_queue.put(("done", None))
-
-    def execute_all():
-        nonlocal worker_thread
-        if worker_thread is not None and worker_thread.is_alive():
-            return
 
+    def collect_payload():
+        """Validate the form and build a pipeline payload, or None after showing why not."""
         source = source_var.get().strip()
-        set_progress(0)
-        log_text.config(state="normal")
-        log_text.delete("1.0", "end")
-        log_text.config(state="disabled")
-
-        root_path = dest_root_var.get().strip()
-        choice = dest_var.get().strip()
-        if not root_path or not os.path.isdir(root_path):
-            messagebox.showerror("Error", "Destination root is invalid. Update Settings.")
-            return
-        if not choice:
-            messagebox.showerror("Error", "Select a destination folder inside the root.")
-            return
-
-        off_week = is_off_week_folder(choice)
-        week_text = week_var.get().strip()
-        if not off_week:
-            if not week_text:
-                messagebox.showerror("Error", "Please enter a week number.")
-                return
-            try:
-                int(week_text)
-            except ValueError:
-                messagebox.showerror("Error", "Week must be a number.")
-                return
-
-        if off_week:
-            dest = os.path.join(root_path, choice)
-        else:
-            week_name = f"Week {week_text}"
-            dest = os.path.join(root_path, choice, week_name)
+        try:
+            dest = resolve_dest(dest_root_var.get().strip(), dest_var.get().strip(), week_var.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
         dest_path_var.set(normalize_path(dest))
 
         try:
             os.makedirs(dest, exist_ok=True)
         except Exception as e:
             messagebox.showerror("Error", f"Could not create destination: {e}")
-            return
+            return None
 
         rs_selected = list(rs_selected_set)
         ms_selected = list(ms_selection_order)
@@ -1342,28 +1400,41 @@ del "%~f0"
         has_ms_work = any(v["order"] for v in ms_variant_targets)
         if not rs_selected and not has_ms_work:
             messagebox.showinfo("No Action", "No RS or MS selections to process.")
-            return
+            return None
 
         if has_ms_work and not os.path.isdir(os.path.join(source, "MS")):
             messagebox.showerror("Error", "MS folder not found under source path.")
-            return
+            return None
 
         suggested_filename = build_ms_filename(date_var.get(), initials_var.get())
         custom_filename = ms_filename_entry_var.get().strip()
         base_filename = ensure_mp4_extension(custom_filename or suggested_filename)
         if has_ms_work and not base_filename:
             messagebox.showerror("Error", "Enter both date and initials, or provide a custom output filename.")
+            return None
+
+        return build_payload(
+            app_config,
+            source,
+            dest,
+            rs_selected,
+            ms_variant_targets if has_ms_work else [],
+            base_filename,
+        )
+
+    def execute_all():
+        nonlocal worker_thread
+        if worker_thread is not None and worker_thread.is_alive():
             return
 
-        payload = {
-            "source": source,
-            "dest": dest,
-            "rs_selected": rs_selected,
-            "ms_variants": ms_variant_targets if has_ms_work else [],
-            "base_filename": base_filename,
-            "ffmpeg_names": app_config.get("ffmpeg_names", []),
-            "ffmpeg_download_url": app_config.get("ffmpeg_download_url", ""),
-        }
+        set_progress(0)
+        log_text.config(state="normal")
+        log_text.delete("1.0", "end")
+        log_text.config(state="disabled")
+
+        payload = collect_payload()
+        if payload is None:
+            return
 
         action_btn.config(state="disabled")
         set_busy(True, "Processing assets")
@@ -1372,6 +1443,96 @@ del "%~f0"
         root.after(100, process_queue)
 
     action_btn.config(command=execute_all)
+
+    queue_events = queue.Queue()
+    job_queue = JobQueue(
+        queue_path_from_config(app_config),
+        run_job,
+        workers=config_int(app_config, "queue_workers", 1),
+        on_event=lambda job_id, kind, value: queue_events.put((job_id, kind, value)),
+    )
+    queue_labels = {}
+
+    def _queue_row_values(job):
+        status = job["status"]
+        if status == "failed" and job.get("error"):
+            status = "failed (see log)"
+        return (status, f"{job.get('progress', 0):.0f}%")
+
+    def refresh_queue_view():
+        jobs = job_queue.jobs()
+        current = {job["id"] for job in jobs}
+        for iid in queue_tree.get_children():
+            if iid not in current:
+                queue_tree.delete(iid)
+        for job in jobs:
+            queue_labels[job["id"]] = job["label"]
+            if queue_tree.exists(job["id"]):
+                queue_tree.item(job["id"], values=_queue_row_values(job))
+            else:
+                queue_tree.insert("", "end", iid=job["id"], text=job["label"], values=_queue_row_values(job))
+
+    def poll_queue_events():
+        changed = False
+        progress = {}
+        try:
+            while True:
+                job_id, kind, value = queue_events.get_nowait()
+                label = queue_labels.get(job_id, job_id)
+                if kind == "progress":
+                    progress[job_id] = value
+                elif kind == "status":
+                    changed = True
+                    if value in ("done", "failed"):
+                        log(f"[Queue] {label}: {value}")
+                elif kind in ("log", "error"):
+                    log(f"[{label}] {value}")
+        except queue.Empty:
+            pass
+        if changed:
+            refresh_queue_view()
+        for job_id, value in progress.items():
+            if queue_tree.exists(job_id):
+                queue_tree.set(job_id, "progress", f"{value:.0f}%")
+        root.after(250, poll_queue_events)
+
+    def add_to_queue():
+        payload = collect_payload()
+        if payload is None:
+            return
+        root_path = dest_root_var.get().strip()
+        try:
+            label = os.path.relpath(payload["dest"], root_path)
+        except ValueError:
+            label = payload["dest"]
+        job_queue.add(label, payload)
+        log(f"[Queue] Added {label}")
+
+    def _selected_job():
+        selection = queue_tree.selection()
+        return selection[0] if selection else None
+
+    def remove_queued_job():
+        job_id = _selected_job()
+        if job_id and not job_queue.remove(job_id):
+            messagebox.showinfo("Queue", "A running job can't be removed; wait for it to finish.")
+
+    def retry_queued_job():
+        job_id = _selected_job()
+        if job_id:
+            job_queue.retry(job_id)
+
+    queue_btn.config(command=add_to_queue)
+    queue_remove_btn.config(command=remove_queued_job)
+    queue_retry_btn.config(command=retry_queued_job)
+    queue_clear_btn.config(command=job_queue.clear_finished)
+    refresh_queue_view()
+    resumed = [job["label"] for job in job_queue.jobs() if job.get("resumed")]
+    if resumed:
+        log(f"[Queue] Resuming interrupted jobs: {', '.join(resumed)}")
+    job_queue.start()
+    poll_queue_events()
+
     def open_destination_folder():
         path = dest_path_var.get().strip()
         if not path:
@@ -1386,11 +1547,24 @@ del "%~f0"
             messagebox.showerror("Error", f"Could not open folder: {e}")
 
     open_btn.config(command=open_destination_folder)
-    refresh_dest_options()
+    refresh_all_lists()
     check_for_updates_async()
+    profiler.mark("status + actions")
+    profiler.watch_first_paint(root)
 
     root.mainloop()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PSA File Drop Utility")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help=f"Record time-to-first-paint and a per-phase breakdown in {PROFILE_FILENAME}",
+    )
+    args, _ = parser.parse_known_args(argv)
+    run_gui(profile_startup=args.profile_startup)
+
+
 if __name__ == "__main__":
-    run_gui()
+    main()
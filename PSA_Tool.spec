@@ -8,10 +8,19 @@ a = Analysis(
     datas=[
         ('animations\\logo_load_animation.json', 'animations'),
         ('animations\\images\\img_0.png', 'animations\\images'),
-    ] + [
-        (src, 'animations\\Frames\\LoadLogoAnimimation')
-        for src in glob.glob('animations\\Frames\\LoadLogoAnimimation\\*.png')
-    ],
+    ] + (
+        # Ship the pre-baked sprite sheet (scripts/build_frame_atlas.py) instead of
+        # the raw frames when it exists.
+        [
+            ('animations\\LoadLogoAnimimation_64.png', 'animations'),
+            ('animations\\LoadLogoAnimimation_64.json', 'animations'),
+        ]
+        if glob.glob('animations\\LoadLogoAnimimation_64.png')
+        else [
+            (src, 'animations\\Frames\\LoadLogoAnimimation')
+            for src in glob.glob('animations\\Frames\\LoadLogoAnimimation\\*.png')
+        ]
+    ),
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,47 @@
+import argparse
+import json
+from pathlib import Path
+
+
+def _load(path: Path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data, {row["name"]: row for row in data.get("results", [])}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files and flag regressions.")
+    parser.add_argument("baseline", type=Path, help="Results from the previous version")
+    parser.add_argument("candidate", type=Path, help="Results from the new version")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown counted as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore measurements faster than this in both runs")
+    args = parser.parse_args()
+
+    base_meta, base = _load(args.baseline)
+    cand_meta, cand = _load(args.candidate)
+    print(f"{base_meta.get('version')} -> {cand_meta.get('version')}")
+    print(f"{'benchmark':<40} {'before':>9} {'after':>9} {'change':>8}")
+
+    regressions = []
+    for name, row in cand.items():
+        old = base.get(name)
+        if not old:
+            print(f"{name:<40} {'-':>9} {row['median']:>8.3f}s {'new':>8}")
+            continue
+        before, after = old["median"], row["median"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold and max(before, after) >= args.min_seconds:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40} {before:>8.3f}s {after:>8.3f}s {change:>+7.1f}%{flag}")
+    for name in sorted(set(base) - set(cand)):
+        print(f"{name:<40} {base[name]['median']:>8.3f}s {'-':>9} {'missing':>8}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0f}%.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+# Library sizes for the suite: RS clip count and size, MS clip count and length.
+LIBRARY_SIZES = {
+    "small": {"rs_clips": 10, "rs_mb": 20, "ms_clips": 4, "ms_seconds": 2},
+    "medium": {"rs_clips": 50, "rs_mb": 50, "ms_clips": 8, "ms_seconds": 4},
+    "large": {"rs_clips": 200, "rs_mb": 100, "ms_clips": 16, "ms_seconds": 6},
+}
+WAV_MB = 5
+
+
+def _write_file(path: Path, size: int, dense: bool) -> None:
+    with open(path, "wb") as f:
+        if not dense:
+            # Sparse: costs no disk space or write time, but reads never hit the disk.
+            f.truncate(size)
+            return
+        block = os.urandom(1024 * 1024)
+        remaining = size
+        while remaining:
+            chunk = block[: min(remaining, len(block))]
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+def make_ms_clip(ffmpeg_path: str, path: Path, seconds: int, index: int) -> None:
+    # Alternate frame sizes so the stitch has to normalize, as real MS clips do.
+    size = "1920x1080" if index % 2 == 0 else "1280x720"
+    subprocess.run(
+        [
+            ffmpeg_path, "-y", "-hide_banner", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc=size={size}:rate=30",
+            "-f", "lavfi", "-i", f"sine=frequency={220 + 40 * index}:sample_rate=48000",
+            "-t", str(seconds), "-pix_fmt", "yuv420p",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", str(path),
+        ],
+        check=True,
+    )
+
+
+def make_library(root: Path, size_name: str, ffmpeg_path: Optional[str], dense: bool = False) -> Dict:
+    """Create (or reuse) a synthetic source folder laid out like the real share.
+
+    RS .mov/.wav files are filler of the right size; MS .mp4 clips are real
+    testsrc/sine encodes and are only made when ffmpeg is available.
+    """
+    spec = LIBRARY_SIZES[size_name]
+    source = Path(root) / f"{size_name}{'-dense' if dense else ''}"
+    music = source / "Music"
+    ms_dir = source / "MS"
+    music.mkdir(parents=True, exist_ok=True)
+    ms_dir.mkdir(parents=True, exist_ok=True)
+
+    rs_names = [f"RS_{idx:04d}" for idx in range(spec["rs_clips"])]
+    for name in rs_names:
+        mov = source / f"{name}.mov"
+        if not mov.exists() or mov.stat().st_size != spec["rs_mb"] * 1024 * 1024:
+            _write_file(mov, spec["rs_mb"] * 1024 * 1024, dense)
+        wav = music / f"{name}.wav"
+        if not wav.exists():
+            _write_file(wav, WAV_MB * 1024 * 1024, dense)
+
+    ms_names = []
+    if ffmpeg_path:
+        for idx in range(spec["ms_clips"]):
+            name = f"MS_{idx:03d}"
+            clip = ms_dir / f"{name}.mp4"
+            if not clip.exists():
+                make_ms_clip(ffmpeg_path, clip, spec["ms_seconds"], idx)
+            ms_names.append(name)
+
+    return {
+        "source": str(source),
+        "rs_names": rs_names,
+        "ms_names": ms_names,
+        "rs_bytes": len(rs_names) * (spec["rs_mb"] + WAV_MB) * 1024 * 1024,
+    }
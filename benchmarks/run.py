@@ -0,0 +1,182 @@
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from config import load_config  # noqa: E402
+from ffmpeg_utils import ffmpeg_info, find_ffmpeg_existing  # noqa: E402
+from file_ops import build_folder_structure, copy_selected_files  # noqa: E402
+from fixtures import LIBRARY_SIZES, make_library  # noqa: E402
+from pipeline import build_payload, run_job  # noqa: E402
+from source_index import INDEX_KINDS, SourceIndex  # noqa: E402
+from version import __version__  # noqa: E402
+
+
+def _timed(func: Callable[[], object], repeat: int, setup: Callable[[], None] = None) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _record(results: List[Dict], name: str, samples: List[float], **extra) -> None:
+    row = {
+        "name": name,
+        "samples": [round(s, 4) for s in samples],
+        "median": round(statistics.median(samples), 4),
+        "min": round(min(samples), 4),
+    }
+    row.update(extra)
+    results.append(row)
+    print(f"{name:<40} median {row['median']:>8.3f}s  min {row['min']:>8.3f}s")
+
+
+def bench_scan(results, work: Path, size_name: str, library: Dict, repeat: int) -> None:
+    index_path = work / "index.json"
+
+    def _cold_setup():
+        if index_path.exists():
+            index_path.unlink()
+
+    def _cold():
+        SourceIndex(index_path).refresh(library["source"])
+
+    def _listing():
+        index = SourceIndex(index_path)
+        index.refresh(library["source"])
+        for kind in INDEX_KINDS:
+            index.items(library["source"], kind)
+
+    _record(results, f"scan/{size_name}/cold", _timed(_cold, repeat, _cold_setup))
+    _cold()
+    _record(results, f"scan/{size_name}/warm", _timed(_listing, repeat))
+
+
+def bench_copy(results, work: Path, size_name: str, library: Dict, config: Dict, repeat: int) -> None:
+    dest = work / "copy-dest"
+
+    def _clean():
+        shutil.rmtree(dest, ignore_errors=True)
+        build_folder_structure(str(dest))
+
+    def _copy(incremental: bool):
+        copy_selected_files(
+            str(dest),
+            library["rs_names"],
+            library["source"],
+            max_workers=config.get("copy_workers", 4),
+            buffer_size=config.get("copy_buffer_mb", 8) * 1024 * 1024,
+            incremental=incremental,
+        )
+
+    samples = _timed(lambda: _copy(False), repeat, _clean)
+    _record(
+        results,
+        f"copy/{size_name}/full",
+        samples,
+        bytes=library["rs_bytes"],
+        mb_per_s=round(library["rs_bytes"] / (1024 * 1024) / statistics.median(samples), 1),
+    )
+    _copy(True)  # records the manifest, so the timed runs below skip every file
+    _record(results, f"copy/{size_name}/incremental-unchanged", _timed(lambda: _copy(True), repeat))
+    shutil.rmtree(dest, ignore_errors=True)
+
+
+def bench_stitch(results, work: Path, size_name: str, library: Dict, config: Dict, variants: List[int], repeat: int) -> None:
+    names = library["ms_names"]
+    dest = work / "stitch-dest"
+    cache_dir = work / "ms_cache"
+    for count in variants:
+        # Each version uses every clip, rotated, so versions share clips as real drops do.
+        ms_variants = [{"name": f"V{idx + 1}", "order": names[idx:] + names[:idx]} for idx in range(count)]
+        payload = build_payload(config, library["source"], str(dest), [], ms_variants, "Bench_MS_.mp4")
+        payload["ms_cache_dir"] = str(cache_dir)
+
+        def _clean(cold: bool):
+            shutil.rmtree(dest, ignore_errors=True)
+            if cold:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        def _stitch():
+            errors = []
+            if not run_job(payload, lambda kind, value: errors.append(value) if kind == "error" else None):
+                raise RuntimeError("; ".join(map(str, errors)))
+
+        _record(results, f"stitch/{size_name}/{count}-variants/cold-cache", _timed(_stitch, repeat, lambda: _clean(True)), clips=len(names))
+        _record(results, f"stitch/{size_name}/{count}-variants/warm-cache", _timed(_stitch, repeat, lambda: _clean(False)), clips=len(names))
+    shutil.rmtree(dest, ignore_errors=True)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time source scanning, RS copy and MS stitching on synthetic media.")
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=sorted(LIBRARY_SIZES), help="Library sizes to run")
+    parser.add_argument("--variants", type=int, nargs="+", default=[1, 2, 4], help="MS version counts to stitch")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the median is reported)")
+    parser.add_argument("--only", nargs="+", choices=["scan", "copy", "stitch"], default=["scan", "copy", "stitch"])
+    parser.add_argument("--dense", action="store_true", help="Fill RS files with data instead of making them sparse")
+    parser.add_argument("--ffmpeg", help="ffmpeg to use (default: the one the app would find)")
+    parser.add_argument("--workdir", type=Path, help="Keep fixtures here between runs (default: a temp folder)")
+    parser.add_argument("--out", type=Path, default=Path("benchmark_results.json"), help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    config = load_config()
+    ffmpeg_path = args.ffmpeg or find_ffmpeg_existing(config.get("ffmpeg_names", []))
+    if "stitch" in args.only and not ffmpeg_path:
+        print("ffmpeg not found; skipping MS stitch benchmarks.")
+    # Probe ffmpeg up front so stitch timings exclude the search and probe;
+    # ensure_ffmpeg() then reuses this binary from the ffmpeg info cache.
+    if ffmpeg_path:
+        ffmpeg_info(ffmpeg_path)
+        config = dict(config, ffmpeg_names=[ffmpeg_path])
+
+    work_root = args.workdir or Path(tempfile.mkdtemp(prefix="psa-bench-"))
+    work_root.mkdir(parents=True, exist_ok=True)
+    results: List[Dict] = []
+    try:
+        for size_name in args.sizes:
+            library = make_library(work_root / "fixtures", size_name, ffmpeg_path, dense=args.dense)
+            work = work_root / "runs" / size_name
+            work.mkdir(parents=True, exist_ok=True)
+            if "scan" in args.only:
+                bench_scan(results, work, size_name, library, args.repeat)
+            if "copy" in args.only:
+                bench_copy(results, work, size_name, library, config, args.repeat)
+            if "stitch" in args.only and ffmpeg_path and library["ms_names"]:
+                bench_stitch(results, work, size_name, library, config, args.variants, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        "version": __version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_info(ffmpeg_path).get("version") if ffmpeg_path else None,
+        "dense": args.dense,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    args.out.write_text(json.dumps(report, indent=4), encoding="utf-8")
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
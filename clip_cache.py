@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import base_dir
+from ffmpeg_utils import run_ffmpeg
+
+# Every cached piece is scaled/padded to the same frame size, frame rate and
+# pixel format and carries identical audio, so pieces can be joined with a
+# stream copy without producing a variable-frame-rate file.
+DEFAULT_FPS = "30000/1001"
+
+
+def normalize_filter(fps: str = DEFAULT_FPS) -> str:
+    return (
+        "scale=1920:1080:force_original_aspect_ratio=decrease,"
+        f"pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p"
+    )
+
+
+NORMALIZE_FILTER = normalize_filter()
+
+
+def normalize_args(video_args: List[str], audio_bitrate: str = "128k", fps: str = DEFAULT_FPS) -> List[str]:
+    return (
+        ["-vf", normalize_filter(fps)]
+        + video_args
+        + ["-c:a", "aac", "-b:a", audio_bitrate, "-ar", "48000", "-ac", "2"]
+    )
+
+
+NORMALIZE_ARGS = normalize_args(["-c:v", "libx264", "-preset", "fast", "-crf", "23"])
+CACHE_SUFFIX = ".ts"
+TMP_SUFFIX = ".tmp"
+# Partial files untouched for this long belong to a crashed run; younger ones
+# may still be written by another job (ffmpeg updates them continuously).
+STALE_PARTIAL_SECONDS = 60.0
+
+
+def cache_dir_from_config(config: Dict) -> Path:
+    path = Path(config.get("ms_cache_dir", "ms_cache"))
+    if not path.is_absolute():
+        path = base_dir() / path
+    return path
+
+
+class _SharedState:
+    """Locks and pins for one cache folder, shared by every ClipCache on it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key_locks: Dict[str, threading.Lock] = {}
+        self.pinned: Dict[str, int] = {}
+
+
+_STATES: Dict[str, _SharedState] = {}
+_STATES_LOCK = threading.Lock()
+
+
+def _shared_state(cache_dir: Path) -> _SharedState:
+    key = os.path.normcase(os.path.abspath(cache_dir))
+    with _STATES_LOCK:
+        return _STATES.setdefault(key, _SharedState())
+
+
+class ClipCache:
+    """Content-addressed store of normalized MPEG-TS pieces with LRU eviction.
+
+    Each job builds its own ClipCache (encode settings differ per profile),
+    but all instances on the same folder share one set of key locks and pins,
+    so parallel jobs never encode the same piece twice or evict one that
+    another job is still joining.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int, encode_args: Optional[List[str]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.encode_args = list(encode_args or NORMALIZE_ARGS)
+        state = _shared_state(self.cache_dir)
+        self._lock = state.lock
+        self._key_locks = state.key_locks
+        self._pinned = state.pinned
+        self.evict()
+
+    def _key(self, src_path: str) -> str:
+        st = os.stat(src_path)
+        raw = json.dumps([os.path.abspath(src_path), st.st_size, st.st_mtime_ns, self.encode_args])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def acquire(
+        self,
+        src_path: str,
+        ffmpeg_path: str,
+        on_log: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+        perf=None,
+    ) -> str:
+        """Return a cached piece for src_path, encoding it first on a miss.
+
+        The piece stays pinned (safe from eviction) until release() is called.
+        """
+        key = self._key(src_path)
+        target = self.cache_dir / f"{key}{CACHE_SUFFIX}"
+        with self._key_lock(key):
+            if target.is_file():
+                os.utime(target)
+            else:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                if on_log:
+                    on_log(f"Normalizing {os.path.basename(src_path)} into the clip cache...")
+                # Unique per writer: another process may be normalizing the same clip.
+                tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}")
+                try:
+                    run_ffmpeg(
+                        [ffmpeg_path, "-y", "-i", src_path]
+                        + self.encode_args
+                        + ["-f", "mpegts", str(tmp)],
+                        on_progress=on_progress,
+                        perf=perf,
+                    )
+                    os.replace(tmp, target)
+                finally:
+                    if tmp.exists():
+                        tmp.unlink()
+            with self._lock:
+                self._pinned[str(target)] = self._pinned.get(str(target), 0) + 1
+        return str(target)
+
+    def release(self, paths: List[str]) -> None:
+        with self._lock:
+            for path in paths:
+                count = self._pinned.get(path, 0) - 1
+                if count > 0:
+                    self._pinned[path] = count
+                else:
+                    self._pinned.pop(path, None)
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used pieces over max_bytes and stale temp pieces.
+
+        Temp pieces still being written count against the cap but are never removed.
+        """
+        if not self.cache_dir.is_dir():
+            return
+        with self._lock:
+            entries = []
+            in_progress = 0
+            cutoff = time.time() - STALE_PARTIAL_SECONDS
+            for entry in os.scandir(self.cache_dir):
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    # Renamed or evicted by another job since scandir listed it.
+                    continue
+                if entry.name.endswith(TMP_SUFFIX):
+                    if st.st_mtime >= cutoff:
+                        in_progress += st.st_size
+                        continue
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                elif entry.name.endswith(CACHE_SUFFIX):
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            if self.max_bytes <= 0:
+                return
+            total = in_progress + sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path in self._pinned:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
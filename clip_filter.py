@@ -0,0 +1,49 @@
+import re
+from typing import List, Optional
+
+_TOKEN_SPLIT = re.compile(r"[\s_\-]+")
+
+
+def query_tokens(query: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT.split(query.lower()) if token]
+
+
+def _narrows(previous: List[str], current: List[str]) -> bool:
+    # Anything matching current also matches previous when every previous
+    # token is contained in some current token.
+    return all(any(old in new for new in current) for old in previous)
+
+
+class IncrementalFilter:
+    """Token filter over clip names that reuses the last result while a query grows.
+
+    Every token must appear somewhere in the name, in any order, so
+    "boise 2" matches "PSA_Boise_Week2".
+    """
+
+    def __init__(self):
+        self._items: List[str] = []
+        self._lowered: dict = {}
+        self._last_tokens: Optional[List[str]] = None
+        self._last_result: List[str] = []
+
+    def set_items(self, items: List[str]) -> None:
+        if items == self._items:
+            return
+        self._items = list(items)
+        self._lowered = {item: item.lower() for item in self._items}
+        self._last_tokens = None
+        self._last_result = []
+
+    def filter(self, query: str) -> List[str]:
+        tokens = query_tokens(query)
+        if not tokens:
+            result = list(self._items)
+        else:
+            base = self._items
+            if self._last_tokens and _narrows(self._last_tokens, tokens):
+                base = self._last_result
+            result = [item for item in base if all(token in self._lowered[item] for token in tokens)]
+        self._last_tokens = tokens
+        self._last_result = result
+        return result
@@ -12,8 +12,47 @@ DEFAULT_CONFIG = {
     "logo_path": "Sagebrush.png",
     "ffmpeg_names": ["ffmpeg.exe", "ffmpeg"],
     "ffmpeg_download_url": "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip",
+    "ffmpeg_sha256": "",
     "update_repo": "PoyBoy96/PSA_Tool_",
     "update_token_file": "update_token.txt",
+    "update_download_connections": 4,
+    "update_check_interval_hours": 4,
+    "ms_stitch_workers": 2,
+    "ms_cache_dir": "ms_cache",
+    "ms_cache_max_mb": 10240,
+    "ms_normalize_fps": "30000/1001",
+    "ms_incremental": True,
+    "copy_workers": 4,
+    "copy_buffer_mb": 8,
+    "copy_incremental": True,
+    "copy_fast_hash": False,
+    "copy_zero_copy": True,
+    "copy_hardlink": False,
+    "perf_report": True,
+    "source_index_file": "source_index.json",
+    "search_debounce_ms": 200,
+    "scan_timeout_sec": 10,
+    "watch_source": True,
+    "watch_interval_sec": 5,
+    "queue_file": "psa_jobs.json",
+    "queue_workers": 1,
+    "encoder_profile": "fast turnaround",
+    "encoder_profiles": {
+        "fast turnaround": {
+            "encoder": "auto",
+            "speed": "fast",
+            "quality": 23,
+            "threads": 0,
+            "audio_bitrate": "128k",
+        },
+        "archival": {
+            "encoder": "libx264",
+            "speed": "slow",
+            "quality": 18,
+            "threads": 0,
+            "audio_bitrate": "192k",
+        },
+    },
 }
 
 
@@ -47,3 +86,10 @@ def load_config() -> dict:
     merged = DEFAULT_CONFIG.copy()
     merged.update(data)
     return merged
+
+
+def config_int(config: dict, key: str, default: int) -> int:
+    try:
+        return int(config.get(key, default))
+    except (TypeError, ValueError):
+        return default
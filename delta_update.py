@@ -0,0 +1,171 @@
+import hashlib
+import json
+import lzma
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# A patch is MAGIC, a 4-byte header length, a JSON header (sizes and sha256 of
+# the source and target files) and an LZMA stream of operations:
+#   b"C" + offset + length  copy length bytes from the source at offset
+#   b"I" + length + data    insert literal bytes
+# Offsets and lengths are little-endian unsigned 64-bit integers.
+MAGIC = b"PSADELTA1"
+DELTA_SUFFIX = ".delta"
+BLOCK = 32
+_COPY = struct.Struct("<QQ")
+_LEN = struct.Struct("<Q")
+
+
+class DeltaError(RuntimeError):
+    pass
+
+
+def delta_asset_name(stem: str, from_version: str) -> str:
+    return f"{stem}_from_{from_version}{DELTA_SUFFIX}"
+
+
+def delta_from_version(asset_name: str) -> Optional[str]:
+    match = re.search(r"_from_v?([0-9][0-9A-Za-z.\-]*)\.delta$", asset_name)
+    return match.group(1) if match else None
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _match_length(old: bytes, old_pos: int, new: bytes, new_pos: int) -> int:
+    length = 0
+    step = 4096
+    limit = min(len(old) - old_pos, len(new) - new_pos)
+    while step:
+        while length + step <= limit and old[old_pos + length : old_pos + length + step] == new[new_pos + length : new_pos + length + step]:
+            length += step
+        step //= 2
+    return length
+
+
+def make_patch(old: bytes, new: bytes) -> bytes:
+    """Encode new as copies from old plus literal inserts.
+
+    old is indexed at every BLOCK-aligned offset; new is scanned byte by byte
+    for a matching block, which is then extended in both directions. Content
+    that only moved (as in a rebuilt PyInstaller archive) becomes a few copy
+    operations, and the literal data that remains is LZMA-compressed.
+    """
+    index: Dict[bytes, int] = {}
+    for offset in range(0, len(old) - BLOCK + 1, BLOCK):
+        index.setdefault(old[offset : offset + BLOCK], offset)
+
+    ops = bytearray()
+    literal_start = 0
+    pos = 0
+    while pos + BLOCK <= len(new):
+        old_pos = index.get(new[pos : pos + BLOCK])
+        if old_pos is None:
+            pos += 1
+            continue
+        # Grow the match backwards into the pending literal bytes.
+        back = 0
+        while back < pos - literal_start and back < old_pos and old[old_pos - back - 1] == new[pos - back - 1]:
+            back += 1
+        start, old_start = pos - back, old_pos - back
+        length = _match_length(old, old_start, new, start)
+        if start > literal_start:
+            ops += b"I" + _LEN.pack(start - literal_start) + new[literal_start:start]
+        ops += b"C" + _COPY.pack(old_start, length)
+        pos = literal_start = start + length
+    if literal_start < len(new):
+        ops += b"I" + _LEN.pack(len(new) - literal_start) + new[literal_start:]
+
+    header = json.dumps(
+        {
+            "source_size": len(old),
+            "source_sha256": hashlib.sha256(old).hexdigest(),
+            "target_size": len(new),
+            "target_sha256": hashlib.sha256(new).hexdigest(),
+        }
+    ).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(header)) + header + lzma.compress(bytes(ops), preset=9)
+
+
+def _read_header(f) -> Dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise DeltaError("Not a PSA delta patch.")
+    (length,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(length).decode("utf-8"))
+
+
+def read_patch_header(patch_path: Path) -> Dict:
+    with open(patch_path, "rb") as f:
+        return _read_header(f)
+
+
+def apply_patch(
+    source_path: Path,
+    patch_path: Path,
+    out_path: Path,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """Rebuild the target file from source_path and a patch.
+
+    Raises DeltaError when source_path is not the file the patch was made
+    from or the result does not hash to the expected target; out_path is
+    removed in that case.
+    """
+    source_path, patch_path, out_path = Path(source_path), Path(patch_path), Path(out_path)
+    with open(patch_path, "rb") as f:
+        header = _read_header(f)
+        compressed = f.read()
+    if os.path.getsize(source_path) != header["source_size"] or _sha256_file(source_path) != header["source_sha256"]:
+        raise DeltaError("The installed exe does not match this patch.")
+    try:
+        ops = lzma.decompress(compressed)
+    except lzma.LZMAError as e:
+        raise DeltaError(f"Corrupt delta patch: {e}")
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(source_path, "rb") as src, open(out_path, "wb") as out:
+            pos = 0
+            while pos < len(ops):
+                op = ops[pos : pos + 1]
+                pos += 1
+                if op == b"C":
+                    offset, length = _COPY.unpack_from(ops, pos)
+                    pos += _COPY.size
+                    src.seek(offset)
+                    remaining = length
+                    while remaining:
+                        block = src.read(min(remaining, 1024 * 1024))
+                        if not block:
+                            raise DeltaError("Patch copies past the end of the installed exe.")
+                        out.write(block)
+                        digest.update(block)
+                        remaining -= len(block)
+                elif op == b"I":
+                    (length,) = _LEN.unpack_from(ops, pos)
+                    pos += _LEN.size
+                    block = ops[pos : pos + length]
+                    pos += length
+                    out.write(block)
+                    digest.update(block)
+                else:
+                    raise DeltaError("Corrupt delta patch.")
+                written = out.tell()
+                if on_progress:
+                    on_progress(written, header["target_size"])
+        if written != header["target_size"] or digest.hexdigest() != header["target_sha256"]:
+            raise DeltaError("Patched exe failed verification.")
+    except Exception:
+        try:
+            out_path.unlink()
+        except OSError:
+            pass
+        raise
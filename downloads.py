@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+CHUNK_SIZE = 256 * 1024
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".state"
+MIN_SEGMENT = 1024 * 1024
+SAVE_EVERY = 4 * 1024 * 1024
+
+
+def _open(url: str, headers: Dict[str, str], timeout: float):
+    import urllib.request
+
+    req = urllib.request.Request(url, headers=dict({"User-Agent": "PSA-Tool"}, **headers))
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def _total_from_response(resp, offset: int) -> Optional[int]:
+    content_range = resp.headers.get("Content-Range") or ""
+    # "bytes 100-199/2000": the full size is after the slash.
+    if "/" in content_range:
+        size = content_range.rsplit("/", 1)[1].strip()
+        if size.isdigit():
+            return int(size)
+    length = resp.headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fetch_sha256(url: str, timeout: float = 15) -> Optional[str]:
+    """Read a published checksum file (sha256sum format or a bare digest)."""
+    try:
+        with _open(url, {}, timeout) as resp:
+            text = resp.read(4096).decode("utf-8", "replace")
+    except Exception:
+        return None
+    token = text.strip().split()[0].lower() if text.strip() else ""
+    if len(token) == 64 and all(c in "0123456789abcdef" for c in token):
+        return token
+    return None
+
+
+def download_resumable(
+    url: str,
+    dest_path: Path,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    expected_sha256: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30,
+    retries: int = 5,
+) -> Path:
+    """Download url to dest_path, resuming from dest_path + ".part".
+
+    The partial file survives failures and restarts, so a dropped connection
+    continues with an HTTP Range request instead of starting over. Servers
+    that ignore Range simply send the whole file again. When expected_sha256
+    is given the finished file is verified before it is moved into place.
+    """
+    dest_path = Path(dest_path)
+    part_path = dest_path.with_name(dest_path.name + PART_SUFFIX)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    headers = dict(headers or {})
+
+    attempt = 0
+    while True:
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        request_headers = dict(headers)
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        try:
+            with _open(url, request_headers, timeout) as resp:
+                if offset and resp.status != 206:
+                    offset = 0
+                total = _total_from_response(resp, offset)
+                with open(part_path, "ab" if offset else "wb") as out:
+                    done = offset
+                    while True:
+                        chunk = resp.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        done += len(chunk)
+                        if on_progress:
+                            on_progress(done, total)
+            if total is not None and done < total:
+                raise ConnectionError(f"Connection closed after {done} of {total} bytes.")
+            break
+        except Exception as e:
+            if getattr(e, "code", None) == 416 and offset:
+                # The partial file is already complete or no longer matches; start over.
+                part_path.unlink()
+                continue
+            attempt += 1
+            if attempt > retries:
+                raise
+            time.sleep(min(2 ** attempt, 30))
+
+    if expected_sha256:
+        actual = sha256_of(part_path)
+        if actual.lower() != expected_sha256.lower():
+            part_path.unlink()
+            raise RuntimeError(f"Checksum mismatch for {dest_path.name}: expected {expected_sha256}, got {actual}.")
+    os.replace(part_path, dest_path)
+    return dest_path
+
+
+class _Throttle:
+    """Forward progress at most once per interval, plus the final call."""
+
+    def __init__(self, callback: Optional[Callable[[int, Optional[int]], None]], interval: float):
+        self.callback = callback
+        self.interval = interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, done: int, total: Optional[int]) -> None:
+        if not self.callback:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if done != total and now - self._last < self.interval:
+                return
+            self._last = now
+        self.callback(done, total)
+
+
+class _RangeRefused(RuntimeError):
+    """The server answered a range request with the whole (possibly changed) file."""
+
+
+def _probe_ranges(url: str, headers: Dict[str, str], timeout: float) -> Optional[Dict]:
+    """Validators of url ({"etag", "last_modified"}) when it serves byte ranges, else None."""
+    try:
+        with _open(url, dict(headers, Range="bytes=0-0"), timeout) as resp:
+            if resp.status != 206:
+                return None
+            return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    except Exception:
+        return None
+
+
+def _split(size: int, connections: int):
+    count = max(1, min(connections, size // MIN_SEGMENT or 1))
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+
+def _segments_complete(segments, size: int) -> bool:
+    expected = 0
+    for start, end, done in sorted(segments):
+        if start != expected or done != end - start + 1:
+            return False
+        expected = end + 1
+    return expected == size
+
+
+def _load_segments(state_path: Path, dest_path: Path, identity: Dict):
+    # A partial is only resumed for the same URL, size and ETag/Last-Modified;
+    # another release of the same size would otherwise be stitched into it.
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    if any(state.get(k) != v for k, v in identity.items()):
+        return None
+    if not dest_path.exists() or dest_path.stat().st_size != identity["size"]:
+        return None
+    return state.get("segments")
+
+
+def _save_segments(state_path: Path, identity: Dict, segments) -> None:
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(identity, segments=segments), f)
+    os.replace(tmp, state_path)
+
+
+def _discard(*paths: Path) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_parallel(
+    url: str,
+    dest_path: Path,
+    size: Optional[int],
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    connections: int = 4,
+    progress_interval: float = 0.25,
+    timeout: float = 30,
+    retries: int = 5,
+    expected_sha256: Optional[str] = None,
+) -> Path:
+    """Download url into dest_path over several Range requests at once.
+
+    dest_path is preallocated to size and each connection writes its own
+    byte range in place. Progress per range is kept in dest_path + ".state"
+    together with the URL and the server's ETag/Last-Modified, so an
+    interrupted download of the same file picks up where every range
+    stopped. When the size is unknown or the server ignores Range, this
+    falls back to a single resumable connection. The ranges must add up to
+    exactly size bytes, and the file must match expected_sha256 when given.
+    """
+    dest_path = Path(dest_path)
+    headers = dict(headers or {})
+    throttle = _Throttle(on_progress, progress_interval)
+    validators = _probe_ranges(url, headers, timeout) if size and connections > 1 else None
+    if validators is None:
+        download_resumable(
+            url,
+            dest_path,
+            on_progress=throttle,
+            expected_sha256=expected_sha256,
+            headers=headers,
+            timeout=timeout,
+            retries=retries,
+        )
+        if size and dest_path.stat().st_size != size:
+            dest_path.unlink()
+            raise RuntimeError(f"Downloaded {dest_path.name} has the wrong size (expected {size} bytes).")
+        return dest_path
+
+    identity = dict(validators, url=url, size=size)
+    # If-Range makes the server send the whole file (refused below) if it changed since the probe.
+    validator = validators.get("etag") or validators.get("last_modified")
+    range_headers = dict(headers, **({"If-Range": validator} if validator else {}))
+    state_path = dest_path.with_name(dest_path.name + STATE_SUFFIX)
+    segments = _load_segments(state_path, dest_path, identity)
+    if segments is None:
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(dest_path, "wb") as f:
+            f.truncate(size)
+        segments = _split(size, connections)
+        _save_segments(state_path, identity, segments)
+
+    lock = threading.Lock()
+    saved = {id(seg): seg[2] for seg in segments}
+
+    def _downloaded() -> int:
+        return sum(seg[2] for seg in segments)
+
+    def _fetch(seg) -> None:
+        attempt = 0
+        while True:
+            start, end, done = seg
+            if start + done > end:
+                return
+            try:
+                with _open(url, dict(range_headers, Range=f"bytes={start + done}-{end}"), timeout) as resp:
+                    if resp.status != 206:
+                        raise _RangeRefused(f"{dest_path.name} changed on the server or stopped honouring byte ranges.")
+                    with open(dest_path, "r+b") as out:
+                        out.seek(start + done)
+                        while start + seg[2] <= end:
+                            chunk = resp.read(min(CHUNK_SIZE, end - start - seg[2] + 1))
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                            with lock:
+                                seg[2] += len(chunk)
+                                downloaded = _downloaded()
+                                if seg[2] - saved[id(seg)] >= SAVE_EVERY:
+                                    saved[id(seg)] = seg[2]
+                                    _save_segments(state_path, identity, segments)
+                            throttle(downloaded, size)
+                if start + seg[2] <= end:
+                    raise ConnectionError(f"Range {start}-{end} ended early.")
+                return
+            except _RangeRefused:
+                raise
+            except Exception:
+                attempt += 1
+                if attempt > retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+            finally:
+                with lock:
+                    _save_segments(state_path, identity, segments)
+
+    with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+        for future in [pool.submit(_fetch, seg) for seg in segments]:
+            future.result()
+
+    # The file was preallocated, so its size proves nothing; every range must be filled.
+    if not _segments_complete(segments, size):
+        _discard(dest_path, state_path)
+        raise RuntimeError(f"Downloaded {dest_path.name} is incomplete (expected {size} bytes).")
+    if expected_sha256:
+        actual = sha256_of(dest_path)
+        if actual.lower() != expected_sha256.lower():
+            _discard(dest_path, state_path)
+            raise RuntimeError(f"Checksum mismatch for {dest_path.name}: expected {expected_sha256}, got {actual}.")
+    _discard(state_path)
+    return dest_path
@@ -0,0 +1,71 @@
+from typing import Dict, List
+
+from config import DEFAULT_CONFIG, config_int
+from ffmpeg_utils import HW_ENCODERS, encoder_works, ffmpeg_info
+
+DEFAULT_PROFILE = "fast turnaround"
+FALLBACK_ENCODER = "libx264"
+
+# Profiles live in psa_config.json ("encoder_profiles"). "encoder": "auto"
+# picks the first hardware H.264 encoder that works on this machine and
+# libx264 otherwise; "threads": 0 leaves the count to ffmpeg; "quality" is a
+# CRF-like number (lower is better) mapped onto each encoder's own setting.
+DEFAULT_PROFILES = DEFAULT_CONFIG["encoder_profiles"]
+
+# Encoder-specific names for the "speed" setting.
+_NVENC_PRESETS = {"fast": "p3", "medium": "p5", "slow": "p7"}
+_AMF_QUALITY = {"fast": "speed", "medium": "balanced", "slow": "quality"}
+
+
+def profile_from_config(config: Dict) -> Dict:
+    """The selected profile merged over its built-in defaults, with its name."""
+    profiles = dict(DEFAULT_PROFILES)
+    profiles.update(config.get("encoder_profiles") or {})
+    name = config.get("encoder_profile") or DEFAULT_PROFILE
+    if name not in profiles:
+        name = DEFAULT_PROFILE
+    profile = dict(DEFAULT_PROFILES.get(name, DEFAULT_PROFILES[DEFAULT_PROFILE]))
+    profile.update(profiles[name])
+    profile["name"] = name
+    # Hand-edited values such as "auto" or "23.5" fall back instead of failing the job.
+    defaults = DEFAULT_PROFILES.get(name, DEFAULT_PROFILES[DEFAULT_PROFILE])
+    profile["threads"] = config_int(profile, "threads", int(defaults.get("threads", 0)))
+    profile["quality"] = config_int(profile, "quality", int(defaults.get("quality", 23)))
+    return profile
+
+
+def video_args(encoder: str, profile: Dict) -> List[str]:
+    speed = str(profile.get("speed", "fast"))
+    quality = str(profile.get("quality", 23))
+    if encoder == "h264_nvenc":
+        args = ["-c:v", encoder, "-preset", _NVENC_PRESETS.get(speed, "p4"), "-rc", "vbr", "-cq", quality, "-b:v", "0"]
+    elif encoder == "h264_qsv":
+        args = ["-c:v", encoder, "-preset", speed, "-global_quality", quality]
+    elif encoder == "h264_amf":
+        args = ["-c:v", encoder, "-quality", _AMF_QUALITY.get(speed, "balanced"), "-rc", "cqp", "-qp_i", quality, "-qp_p", quality]
+    else:
+        args = ["-c:v", encoder, "-preset", speed, "-crf", quality]
+    threads = int(profile.get("threads") or 0)
+    if threads > 0:
+        args += ["-threads", str(threads)]
+    return args
+
+
+def output_args(encoder: str, profile: Dict) -> List[str]:
+    return video_args(encoder, profile) + ["-c:a", "aac", "-b:a", str(profile.get("audio_bitrate", "128k"))]
+
+
+def choose_encoder(ffmpeg_path: str, profile: Dict, on_log=None) -> str:
+    """Resolve the profile's encoder to one that works with this ffmpeg."""
+    wanted = profile.get("encoder") or "auto"
+    if wanted == FALLBACK_ENCODER:
+        return FALLBACK_ENCODER
+    listed = ffmpeg_info(ffmpeg_path).get("encoders", [])
+    candidates: List[str] = HW_ENCODERS if wanted == "auto" else [wanted]
+    for encoder in candidates:
+        if encoder in listed and encoder_works(ffmpeg_path, encoder):
+            return encoder
+        if wanted != "auto" and on_log:
+            on_log(f"Encoder {encoder} is not usable with this ffmpeg; using {FALLBACK_ENCODER}.")
+    return FALLBACK_ENCODER
+
@@ -1,14 +1,21 @@
+import json
 import os
+import re
 import shutil
 import subprocess
 import sys
-import tempfile
-import zipfile
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Optional
-import urllib.request
+from typing import Callable, Dict, List, Optional
 
 from config import base_dir
+from perf import span
+
+FFMPEG_INFO_FILENAME = "ffmpeg_info.json"
+HW_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_amf"]
+# Parallel jobs (CLI --jobs, queue workers) share ffmpeg_info.json.
+_INFO_LOCK = threading.RLock()
 
 
 def find_ffmpeg_existing(ffmpeg_names: List[str]) -> Optional[str]:
@@ -24,31 +31,360 @@ def find_ffmpeg_existing(ffmpeg_names: List[str]) -> Optional[str]:
     return shutil.which("ffmpeg")
 
 
-def _download_ffmpeg(download_url: str) -> str:
+def find_ffprobe(ffmpeg_path: str) -> Optional[str]:
+    folder = Path(ffmpeg_path).parent
+    for name in ("ffprobe.exe", "ffprobe"):
+        candidate = folder / name
+        if candidate.is_file():
+            return str(candidate)
+    return shutil.which("ffprobe")
+
+
+def probe_media(ffprobe_path: str, path: str) -> dict:
+    cmd = [
+        ffprobe_path,
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration:stream=codec_type,codec_name,width,height,pix_fmt,time_base,sample_rate,channels,channel_layout",
+        "-of",
+        "json",
+        path,
+    ]
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    result = subprocess.run(cmd, capture_output=True, text=True, creationflags=creationflags)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ffprobe failed for {path}")
+    return json.loads(result.stdout or "{}")
+
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+_VIDEO_RE = re.compile(r"Stream #\S+.*?: Video: (\w+)[^,]*, (\w+)")
+_SIZE_RE = re.compile(r", (\d{2,5})x(\d{2,5})")
+_TBN_RE = re.compile(r"([\d.]+k?) tbn")
+_AUDIO_RE = re.compile(r"Stream #\S+.*?: Audio: (\w+)[^,]*, (\d+) Hz, ([^,]+)")
+_LAYOUT_CHANNELS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "5.0": 5, "5.1": 6, "7.1": 8}
+
+
+def probe_media_ffmpeg(ffmpeg_path: str, path: str) -> dict:
+    """ffprobe-shaped stream details parsed from the `ffmpeg -i` banner.
+
+    Used when no ffprobe sits next to ffmpeg (installs from before ffprobe
+    was extracted), so the stream-copy check still runs. Only the fields
+    the stitcher compares are filled in.
+    """
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    # Without an output ffmpeg exits with an error after printing the input details.
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-i", path],
+        capture_output=True,
+        text=True,
+        creationflags=creationflags,
+    )
+    banner = result.stderr
+    streams = []
+    video = _VIDEO_RE.search(banner)
+    if video:
+        line = banner[video.start():].splitlines()[0]
+        size = _SIZE_RE.search(line)
+        tbn = _TBN_RE.search(line)
+        timescale = tbn.group(1) if tbn else ""
+        if timescale.endswith("k"):
+            timescale = str(int(float(timescale[:-1]) * 1000))
+        streams.append({
+            "codec_type": "video",
+            "codec_name": video.group(1),
+            "pix_fmt": video.group(2),
+            "width": int(size.group(1)) if size else None,
+            "height": int(size.group(2)) if size else None,
+            "time_base": f"1/{timescale}" if timescale else None,
+        })
+    audio = _AUDIO_RE.search(banner)
+    if audio:
+        layout = audio.group(3).strip()
+        streams.append({
+            "codec_type": "audio",
+            "codec_name": audio.group(1),
+            "sample_rate": audio.group(2),
+            "channel_layout": layout,
+            "channels": _LAYOUT_CHANNELS.get(layout),
+        })
+    if not streams:
+        raise RuntimeError(banner.strip().splitlines()[-1] if banner.strip() else f"ffmpeg could not read {path}")
+    probe = {"streams": streams, "format": {}}
+    duration = _DURATION_RE.search(banner)
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        probe["format"]["duration"] = str(int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    return probe
+
+
+def media_duration(probe: dict) -> float:
+    try:
+        return float(probe.get("format", {}).get("duration") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return None
+
+
+def _progress_stats(fields: Dict[str, str]) -> Dict[str, Optional[float]]:
+    out_time_us = _parse_float(fields.get("out_time_us") or fields.get("out_time_ms"))
+    return {
+        "out_time": out_time_us / 1_000_000 if out_time_us is not None else None,
+        "fps": _parse_float(fields.get("fps")),
+        "speed": _parse_float(fields.get("speed")),
+        "done": fields.get("progress") == "end",
+    }
+
+
+def run_ffmpeg(cmd: List[str], on_progress: Optional[Callable[[Dict], None]] = None, perf=None) -> None:
+    """Run one ffmpeg command; with perf, it is recorded as an "ffmpeg" span with the output size."""
+    with span(perf, "ffmpeg", output=os.path.basename(cmd[-1])) as attrs:
+        _run_ffmpeg(cmd, on_progress)
+        if perf is not None and os.path.isfile(cmd[-1]):
+            attrs["bytes"] = os.path.getsize(cmd[-1])
+
+
+def _run_ffmpeg(cmd: List[str], on_progress: Optional[Callable[[Dict], None]]) -> None:
+    creationflags = 0
+    if os.name == "nt":
+        creationflags = subprocess.CREATE_NO_WINDOW
+
+    if on_progress is None:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            creationflags=creationflags,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "ffmpeg failed")
+        return
+
+    # -progress writes key=value blocks to stdout, each closed by a progress= line.
+    proc = subprocess.Popen(
+        [cmd[0], "-progress", "pipe:1", "-nostats"] + cmd[1:],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        creationflags=creationflags,
+    )
+    stderr_tail = deque(maxlen=50)
+    reader = threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True)
+    reader.start()
+
+    fields: Dict[str, str] = {}
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        fields[key] = value
+        if key == "progress":
+            on_progress(_progress_stats(fields))
+            fields = {}
+
+    proc.wait()
+    reader.join()
+    if proc.returncode != 0:
+        raise RuntimeError("".join(stderr_tail).strip() or "ffmpeg failed")
+
+
+def _extract_member(zf, member: str, target: Path) -> None:
+    tmp = target.with_name(target.name + ".tmp")
+    with zf.open(member) as src, open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp, target)
+
+
+def _download_ffmpeg(
+    download_url: str,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    expected_sha256: str = "",
+) -> str:
+    import zipfile
+
+    from downloads import download_resumable, fetch_sha256
+
     bin_dir = base_dir() / "ffmpeg-bin"
     bin_dir.mkdir(exist_ok=True)
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-    tmp_path = Path(tmp.name)
+    # The archive's ".part" file lives in ffmpeg-bin so an interrupted download
+    # resumes on the next attempt, even after the app restarts.
+    zip_path = bin_dir / "ffmpeg-download.zip"
+    if not expected_sha256:
+        expected_sha256 = fetch_sha256(download_url + ".sha256") or ""
+    download_resumable(download_url, zip_path, on_progress=on_progress, expected_sha256=expected_sha256 or None)
     try:
-        with urllib.request.urlopen(download_url) as resp, open(tmp_path, "wb") as out:
-            shutil.copyfileobj(resp, out)
-        with zipfile.ZipFile(tmp_path, "r") as zf:
-            member = next((m for m in zf.namelist() if m.lower().endswith("bin/ffmpeg.exe")), None)
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            names = zf.namelist()
+            member = next((m for m in names if m.lower().endswith("bin/ffmpeg.exe")), None)
             if not member:
                 raise RuntimeError("Could not find ffmpeg.exe in downloaded archive.")
             target = bin_dir / "ffmpeg.exe"
-            with zf.open(member) as src, open(target, "wb") as dst:
-                shutil.copyfileobj(src, dst)
+            _extract_member(zf, member, target)
+            # ffprobe is optional; without it stitching skips the stream-copy check.
+            probe_member = next((m for m in names if m.lower().endswith("bin/ffprobe.exe")), None)
+            if probe_member:
+                _extract_member(zf, probe_member, bin_dir / "ffprobe.exe")
         return str(target)
     finally:
         try:
-            os.remove(tmp_path)
+            os.remove(zip_path)
         except Exception:
             pass
 
 
-def ensure_ffmpeg(ffmpeg_names: List[str], download_url: str) -> str:
+def _info_path() -> Path:
+    return base_dir() / FFMPEG_INFO_FILENAME
+
+
+def _binary_stamp(path: str) -> Dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _load_ffmpeg_info() -> Dict:
+    try:
+        with open(_info_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_ffmpeg_info(info: Dict) -> None:
+    path = _info_path()
+    # Written to a per-writer temp file and swapped in, so no reader (or other process) sees half a file.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with _INFO_LOCK:
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(info, f, indent=4)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _cached_info_for(path: str) -> Optional[Dict]:
+    info = _load_ffmpeg_info()
+    if not info.get("path") or os.path.normcase(info["path"]) != os.path.normcase(path):
+        return None
+    try:
+        if _binary_stamp(path) != info.get("stamp"):
+            return None
+    except OSError:
+        return None
+    return info
+
+
+def _list_components(ffmpeg_path: str, flag: str) -> List[str]:
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", flag],
+        capture_output=True,
+        text=True,
+        creationflags=creationflags,
+    )
+    names = []
+    past_header = False
+    for line in result.stdout.splitlines():
+        # Both listings print a legend, then a dashed separator, then "FLAGS name description".
+        if line.strip().startswith("--"):
+            past_header = True
+            continue
+        parts = line.split()
+        if past_header and len(parts) >= 2:
+            names.append(parts[1])
+    return names
+
+
+def probe_ffmpeg_capabilities(ffmpeg_path: str) -> Dict:
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-version"],
+        capture_output=True,
+        text=True,
+        creationflags=creationflags,
+    )
+    version_line = (result.stdout.splitlines() or [""])[0]
+    return {
+        "version": version_line.strip(),
+        "encoders": _list_components(ffmpeg_path, "-encoders"),
+        "muxers": _list_components(ffmpeg_path, "-muxers"),
+    }
+
+
+def ffmpeg_info(ffmpeg_path: str) -> Dict:
+    """Version, encoders and muxers of ffmpeg_path, probed once per binary.
+
+    The result is cached in FFMPEG_INFO_FILENAME and reused until the
+    binary's size or mtime changes.
+    """
+    with _INFO_LOCK:
+        cached = _cached_info_for(ffmpeg_path)
+        if cached:
+            return cached
+        info = {"path": ffmpeg_path, "stamp": _binary_stamp(ffmpeg_path)}
+        info.update(probe_ffmpeg_capabilities(ffmpeg_path))
+        _save_ffmpeg_info(info)
+    return info
+
+
+def encoder_works(ffmpeg_path: str, encoder: str) -> bool:
+    """Whether encoder can actually encode here, tried once per binary.
+
+    Builds often list hardware encoders (NVENC, QSV, AMF) whose GPU or
+    driver is missing, so a one-frame trial encode is the only real test.
+    The answer is remembered alongside the other capability info.
+    """
+    known = ffmpeg_info(ffmpeg_path).get("encoder_ok", {})
+    if encoder in known:
+        return known[encoder]
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    try:
+        result = subprocess.run(
+            [
+                ffmpeg_path, "-hide_banner", "-v", "error",
+                "-f", "lavfi", "-i", "testsrc=size=640x360:rate=25",
+                "-frames:v", "5", "-pix_fmt", "yuv420p", "-c:v", encoder, "-f", "null", "-",
+            ],
+            capture_output=True,
+            timeout=30,
+            creationflags=creationflags,
+        )
+        works = result.returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        works = False
+    with _INFO_LOCK:
+        # Merge into the current file: other jobs may have recorded their own trials meanwhile.
+        info = ffmpeg_info(ffmpeg_path)
+        info.setdefault("encoder_ok", {})[encoder] = works
+        _save_ffmpeg_info(info)
+    return works
+
+
+def ensure_ffmpeg(
+    ffmpeg_names: List[str],
+    download_url: str,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    expected_sha256: str = "",
+) -> str:
+    cached_path = _load_ffmpeg_info().get("path")
+    if cached_path and _cached_info_for(cached_path):
+        return cached_path
+
     existing = find_ffmpeg_existing(ffmpeg_names)
-    if existing:
-        return existing
-    return _download_ffmpeg(download_url)
+    path = existing or _download_ffmpeg(download_url, on_progress, expected_sha256)
+    try:
+        ffmpeg_info(path)
+    except Exception:
+        pass
+    return path
@@ -1,8 +1,23 @@
+import hashlib
+import json
 import os
 import shutil
-import subprocess
+import sys
 import tempfile
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from clip_cache import STALE_PARTIAL_SECONDS, ClipCache
+from ffmpeg_utils import find_ffprobe, media_duration, probe_media, probe_media_ffmpeg, run_ffmpeg
+from perf import span
+
+MANIFEST_FILENAME = ".psa_manifest.json"
+PARTIAL_MARKER = ".psa-partial"
+FICLONE = 0x40049409  # linux/fs.h: share the source's extents (btrfs, XFS, ...)
+ENCODE_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23", "-c:a", "aac", "-b:a", "128k"]
+_MANIFEST_LOCK = threading.Lock()
 
 
 def build_folder_structure(dest: str) -> None:
@@ -16,21 +31,422 @@ def build_folder_structure(dest: str) -> None:
         os.makedirs(path, exist_ok=True)
 
 
-def copy_selected_files(dest: str, selected: List[str], source: str) -> None:
+def _load_manifest(dest: str) -> Dict:
+    path = os.path.join(dest, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        data = {}
+    data.setdefault("rs", {})
+    data.setdefault("ms", {})
+    return data
+
+
+def _save_manifest(dest: str, manifest: Dict) -> None:
+    path = os.path.join(dest, MANIFEST_FILENAME)
+    # Per-writer temp name so two jobs saving into one destination never share a file.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _update_manifest(dest: str, section: str, key: str, record: Dict) -> None:
+    _update_manifest_section(dest, section, {key: record})
+
+
+def _update_manifest_section(dest: str, section: str, records: Dict) -> None:
+    # RS files and MS versions finish on several threads; each merges its own
+    # records into the file as it is now, leaving the other section alone.
+    with _MANIFEST_LOCK:
+        manifest = _load_manifest(dest)
+        manifest[section].update(records)
+        _save_manifest(dest, manifest)
+
+
+def partial_path(path: str) -> str:
+    """Dot-prefixed temp name next to path, keeping the extension so ffmpeg picks the same muxer."""
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}{PARTIAL_MARKER}{ext}")
+
+
+def sweep_partials(folder: str, min_age: float = STALE_PARTIAL_SECONDS) -> List[str]:
+    """Delete partial files left under folder by an interrupted run.
+
+    Files modified in the last min_age seconds are kept, since another job
+    may still be writing them.
+    """
+    removed = []
+    cutoff = time.time() - min_age
+    for root, _dirs, files in os.walk(folder):
+        for name in files:
+            if not (name.startswith(".") and PARTIAL_MARKER in name):
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed.append(path)
+            except OSError:
+                pass
+    return removed
+
+
+def _ms_signature(input_paths: List[str], encode_args: List[str]) -> str:
+    parts = []
+    for path in input_paths:
+        st = os.stat(path)
+        parts.append([path, st.st_size, st.st_mtime_ns])
+    return hashlib.sha1(json.dumps({"inputs": parts, "args": encode_args}).encode("utf-8")).hexdigest()
+
+
+def _fast_hash(path: str, sample_size: int = 1024 * 1024) -> str:
+    """Hash the size plus the first, middle and last sample of the file."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)}):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def _is_unchanged(src: str, dst: str, record: Optional[Dict], fast_hash: bool) -> bool:
+    if not record or not os.path.isfile(dst):
+        return False
+    st = os.stat(src)
+    if st.st_size != record.get("size") or os.path.getsize(dst) != st.st_size:
+        return False
+    if st.st_mtime_ns == record.get("mtime_ns"):
+        return True
+    # A touched-but-identical source still counts as unchanged when hashing is on.
+    return fast_hash and record.get("hash") is not None and _fast_hash(src) == record["hash"]
+
+
+def _format_rate(bytes_per_sec: float) -> str:
+    return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+
+
+def _copy_file_chunked(src: str, dst: str, buffer_size: int, on_bytes: Callable[[int], None]) -> None:
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+            on_bytes(n)
+    shutil.copystat(src, dst)
+
+
+def _reflink(src: str, dst: str, buffer_size: int, on_bytes: Callable[[int], None]) -> None:
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        on_bytes(os.fstat(fsrc.fileno()).st_size)
+
+
+def _kernel_copy(src: str, dst: str, buffer_size: int, on_bytes: Callable[[int], None], use_range: bool) -> None:
+    # Bytes move inside the kernel (or, for copy_file_range on NFS/SMB mounts, on the server).
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(infd).st_size
+        offset = 0
+        while True:
+            if use_range:
+                n = os.copy_file_range(infd, outfd, buffer_size, offset, offset)
+            else:
+                n = os.sendfile(outfd, infd, offset, buffer_size)
+            if not n:
+                break
+            offset += n
+            on_bytes(n)
+    # Some FUSE/SMB mounts stop early and report it as end of file.
+    if offset != size:
+        raise OSError(f"{os.path.basename(src)}: copied {offset} of {size} bytes")
+
+
+def _windows_copy(src: str, dst: str, buffer_size: int, on_bytes: Callable[[int], None]) -> None:
+    # CopyFileExW lets an SMB server copy between its own shares without the data crossing the network.
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    routine_type = ctypes.WINFUNCTYPE(
+        wintypes.DWORD,
+        ctypes.c_longlong,
+        ctypes.c_longlong,
+        ctypes.c_longlong,
+        ctypes.c_longlong,
+        wintypes.DWORD,
+        wintypes.DWORD,
+        wintypes.HANDLE,
+        wintypes.HANDLE,
+        wintypes.LPVOID,
+    )
+    state = {"done": 0}
+
+    def _progress(total, transferred, *_args):
+        if transferred > state["done"]:
+            on_bytes(transferred - state["done"])
+            state["done"] = transferred
+        return 0  # PROGRESS_CONTINUE
+
+    routine = routine_type(_progress)
+    if not kernel32.CopyFileExW(ctypes.c_wchar_p(src), ctypes.c_wchar_p(dst), routine, None, None, 0):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _fast_copiers() -> List:
+    copiers = []
+    if sys.platform.startswith("linux"):
+        copiers.append(("reflink", _reflink))
+        if hasattr(os, "copy_file_range"):
+            copiers.append(("copy_file_range", lambda *args: _kernel_copy(*args, use_range=True)))
+        copiers.append(("sendfile", lambda *args: _kernel_copy(*args, use_range=False)))
+    elif os.name == "nt":
+        copiers.append(("CopyFileEx", _windows_copy))
+    return copiers
+
+
+FAST_COPIERS = _fast_copiers()
+
+
+def _copy_file(
+    src: str,
+    dst: str,
+    buffer_size: int,
+    on_bytes: Callable[[int], None],
+    hardlink: bool = False,
+    zero_copy: bool = True,
+) -> str:
+    """Copy src to dst with the cheapest method that works and return its name.
+
+    Hardlinks are only made when allowed and dst is on the same volume. The
+    OS copy paths are tried in turn; one that fails (unsupported filesystem,
+    cross-device, or a short copy) falls through to the next, ending with
+    the buffered copy.
+    """
+    if hardlink and os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev:
+        try:
+            if os.path.lexists(dst):
+                os.remove(dst)
+            os.link(src, dst)
+            on_bytes(os.path.getsize(src))
+            return "hardlink"
+        except OSError:
+            pass
+
+    if zero_copy:
+        for method, copier in FAST_COPIERS:
+            copied = [0]
+
+            def _counted(n: int) -> None:
+                copied[0] += n
+                on_bytes(n)
+
+            try:
+                copier(src, dst, buffer_size, _counted)
+            except OSError:
+                # Take back the progress already reported; the next method starts from zero.
+                if copied[0]:
+                    on_bytes(-copied[0])
+                continue
+            shutil.copystat(src, dst)
+            return method
+
+    _copy_file_chunked(src, dst, buffer_size, on_bytes)
+    return "buffered"
+
+
+def copy_selected_files(
+    dest: str,
+    selected: List[str],
+    source: str,
+    max_workers: int = 4,
+    buffer_size: int = 8 * 1024 * 1024,
+    on_progress: Optional[Callable[[int, int, float], None]] = None,
+    on_log: Optional[Callable[[str], None]] = None,
+    incremental: bool = False,
+    fast_hash: bool = False,
+    perf=None,
+    hardlink: bool = False,
+    zero_copy: bool = True,
+) -> Dict:
     rs_folder = os.path.join(dest, "PSAs", "RS")
     music_folder = os.path.join(rs_folder, "Music")
 
+    tasks = []
     for name in selected:
         video_src = os.path.join(source, f"{name}.mov")
         music_src = os.path.join(source, "Music", f"{name}.wav")
 
         if os.path.exists(video_src):
-            shutil.copy2(video_src, rs_folder)
+            tasks.append((video_src, os.path.join(rs_folder, os.path.basename(video_src))))
         if os.path.exists(music_src):
-            shutil.copy2(music_src, music_folder)
+            tasks.append((music_src, os.path.join(music_folder, os.path.basename(music_src))))
+
+    records = _load_manifest(dest)["rs"] if incremental else {}
+    skipped_files = 0
+    skipped_bytes = 0
+    if incremental:
+        pending = []
+        refreshed = {}
+        for src, dst in tasks:
+            rel = os.path.relpath(dst, dest)
+            if _is_unchanged(src, dst, records.get(rel), fast_hash):
+                refreshed[rel] = dict(records[rel], mtime_ns=os.stat(src).st_mtime_ns)
+                skipped_files += 1
+                skipped_bytes += os.path.getsize(src)
+            else:
+                pending.append((src, dst))
+        tasks = pending
+        if refreshed:
+            _update_manifest_section(dest, "rs", refreshed)
+
+    total = sum(os.path.getsize(src) for src, _ in tasks)
+    lock = threading.Lock()
+    state = {"copied": 0, "reported": 0.0}
+    started = time.monotonic()
+
+    def _on_bytes(n: int) -> None:
+        with lock:
+            state["copied"] += n
+            now = time.monotonic()
+            # Throttle to a few updates per second across all workers.
+            if on_progress is None or (now - state["reported"] < 0.25 and state["copied"] < total):
+                return
+            state["reported"] = now
+            copied = state["copied"]
+        on_progress(copied, total, copied / max(now - started, 1e-6))
+
+    def _copy_one(src: str, dst: str) -> None:
+        file_started = time.monotonic()
+        tmp = partial_path(dst)
+        try:
+            with span(perf, "rs file", file=os.path.basename(src), bytes=os.path.getsize(src)) as attrs:
+                method = _copy_file(src, tmp, buffer_size, _on_bytes, hardlink=hardlink, zero_copy=zero_copy)
+                attrs["method"] = method
+            # Replacing the name (never writing through it) also keeps a file
+            # hardlinked by an earlier run from truncating its source.
+            os.replace(tmp, dst)
+        finally:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+        if incremental:
+            st = os.stat(src)
+            record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            if fast_hash:
+                record["hash"] = _fast_hash(src)
+            # Saved per file so a re-run after a crash only copies what is left.
+            _update_manifest(dest, "rs", os.path.relpath(dst, dest), record)
+        if on_log:
+            size = os.path.getsize(src)
+            elapsed = max(time.monotonic() - file_started, 1e-6)
+            how = "" if method == "buffered" else f", {method}"
+            on_log(f"Copied {os.path.basename(src)} ({size / (1024 * 1024):.1f} MB, {_format_rate(size / elapsed)}{how})")
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_copy_one, src, dst): src for src, dst in tasks}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures.append(f"{os.path.basename(futures[future])}: {e}")
+
+    if failures:
+        raise RuntimeError("; ".join(failures))
+
+    elapsed = time.monotonic() - started
+    return {
+        "files": len(tasks),
+        "bytes": total,
+        "seconds": elapsed,
+        "skipped_files": skipped_files,
+        "skipped_bytes": skipped_bytes,
+    }
+
+
+def _stream_signature(probe: dict) -> tuple:
+    video = next((st for st in probe.get("streams", []) if st.get("codec_type") == "video"), {})
+    audio = next((st for st in probe.get("streams", []) if st.get("codec_type") == "audio"), {})
+    return (
+        video.get("codec_name"),
+        video.get("width"),
+        video.get("height"),
+        video.get("pix_fmt"),
+        video.get("time_base"),
+        audio.get("codec_name"),
+        audio.get("sample_rate"),
+        audio.get("channels"),
+        audio.get("channel_layout"),
+    )
+
 
+def clips_share_codec_params(probes: List[dict]) -> bool:
+    return len({_stream_signature(probe) for probe in probes}) == 1
 
-def stitch_ms_files(dest: str, ordered_names: List[str], source: str, output_filename: str, ffmpeg_path: str) -> str:
+
+def _video_encoder(args: List[str]) -> str:
+    return args[args.index("-c:v") + 1] if "-c:v" in args else "ffmpeg"
+
+
+def _write_concat_list(paths: List[str]) -> str:
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt", encoding="utf-8") as tf:
+        for path in paths:
+            safe_path = path.replace("\\", "/").replace("'", r"'\''")
+            tf.write(f"file '{safe_path}'\n")
+        return tf.name
+
+
+def _concat(
+    ffmpeg_path: str,
+    paths: List[str],
+    output_args: List[str],
+    output_path: str,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+    perf=None,
+) -> None:
+    list_path = _write_concat_list(paths)
+    try:
+        run_ffmpeg(
+            [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path] + output_args + [output_path],
+            on_progress=on_progress,
+            perf=perf,
+        )
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def stitch_ms_files(
+    dest: str,
+    ordered_names: List[str],
+    source: str,
+    output_filename: str,
+    ffmpeg_path: str,
+    on_log: Optional[Callable[[str], None]] = None,
+    clip_cache: Optional[ClipCache] = None,
+    on_progress: Optional[Callable[[Optional[float], Optional[float], Optional[float]], None]] = None,
+    encode_args: Optional[List[str]] = None,
+    fallback_args: Optional[List[str]] = None,
+    perf=None,
+    incremental: bool = False,
+) -> str:
+    """Join ordered_names into output_filename, avoiding a re-encode when possible.
+
+    Tries, in order: a stream copy when the clips already match, assembly
+    from clip_cache pieces, and a full re-encode with encode_args. A failed
+    re-encode (typically a hardware encoder) is retried with fallback_args.
+    Probing and every ffmpeg run are recorded as spans on perf when given.
+    With incremental, a version whose clips and encode settings match the
+    manifest record for an existing output is not stitched again.
+    """
     output_dir = os.path.join(dest, "PSAs", "MS")
     os.makedirs(output_dir, exist_ok=True)
 
@@ -42,51 +458,125 @@ def stitch_ms_files(dest: str, ordered_names: List[str], source: str, output_fil
             raise FileNotFoundError(f"Missing source clip: {path}")
         input_paths.append(path)
 
-    output_path = os.path.join(output_dir, output_filename)
+    final_path = os.path.join(output_dir, output_filename)
+    log = on_log or (lambda _msg: None)
 
-    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt", encoding="utf-8") as tf:
-        for path in input_paths:
-            safe_path = path.replace("\\", "/").replace("'", r"'\''")
-            tf.write(f"file '{safe_path}'\n")
-        list_path = tf.name
-
-    cmd = [
-        ffmpeg_path,
-        "-y",
-        "-f",
-        "concat",
-        "-safe",
-        "0",
-        "-i",
-        list_path,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
-        "-crf",
-        "23",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "128k",
-        output_path,
-    ]
-
-    creationflags = 0
-    if os.name == "nt":
-        creationflags = subprocess.CREATE_NO_WINDOW
+    rel = os.path.relpath(final_path, dest)
+    signature = _ms_signature(input_paths, encode_args or ENCODE_ARGS) if incremental else None
+    if incremental:
+        record = _load_manifest(dest)["ms"].get(rel)
+        if (
+            record
+            and record.get("signature") == signature
+            and os.path.isfile(final_path)
+            and os.path.getsize(final_path) == record.get("size")
+        ):
+            log(f"{output_filename}: unchanged since the last run; skipped.")
+            return final_path
 
+    # ffmpeg writes to a partial name in the same folder; only a finished
+    # version is renamed into place, so a crash never leaves a truncated MP4.
+    output_path = partial_path(final_path)
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            creationflags=creationflags,
+        _stitch_into(
+            ffmpeg_path,
+            input_paths,
+            output_path,
+            output_filename,
+            log,
+            clip_cache,
+            on_progress,
+            encode_args,
+            fallback_args,
+            perf,
         )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "ffmpeg failed")
+        os.replace(output_path, final_path)
     finally:
-        if os.path.exists(list_path):
-            os.remove(list_path)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    if incremental:
+        _update_manifest(dest, "ms", rel, {"size": os.path.getsize(final_path), "signature": signature})
+    return final_path
+
+
+def _stitch_into(
+    ffmpeg_path: str,
+    input_paths: List[str],
+    output_path: str,
+    output_filename: str,
+    log: Callable[[str], None],
+    clip_cache: Optional[ClipCache],
+    on_progress: Optional[Callable[[Optional[float], Optional[float], Optional[float]], None]],
+    encode_args: Optional[List[str]],
+    fallback_args: Optional[List[str]],
+    perf,
+) -> None:
+    probes = {}
+    ffprobe_path = find_ffprobe(ffmpeg_path)
+    try:
+        with span(perf, "ms probe", output=output_filename):
+            for path in input_paths:
+                if path in probes:
+                    continue
+                if ffprobe_path:
+                    probes[path] = probe_media(ffprobe_path, path)
+                else:
+                    probes[path] = probe_media_ffmpeg(ffmpeg_path, path)
+    except Exception as e:
+        probes = {}
+        log(f"Could not probe MS clips: {e}")
+
+    stream_copy = bool(probes) and clips_share_codec_params(list(probes.values()))
+    durations = [media_duration(probes[path]) if path in probes else 0.0 for path in input_paths]
+    total_seconds = sum(durations)
+
+    def _tracker(offset: float):
+        # Converts ffmpeg's per-process out_time into a percent of the whole version.
+        if on_progress is None:
+            return None
 
-    return output_path
+        def _report(stats):
+            percent = None
+            if total_seconds > 0:
+                percent = min(100.0, (offset + (stats["out_time"] or 0.0)) / total_seconds * 100)
+            on_progress(percent, stats["fps"], stats["speed"])
+
+        return _report
+
+    if stream_copy:
+        try:
+            _concat(ffmpeg_path, input_paths, ["-c", "copy"], output_path, on_progress=_tracker(0.0), perf=perf)
+            log(f"{output_filename}: stream copy (clips share codec parameters).")
+            return
+        except RuntimeError as e:
+            log(f"{output_filename}: stream copy failed ({str(e).splitlines()[-1]}).")
+
+    if clip_cache is not None:
+        pieces = []
+        try:
+            for idx, path in enumerate(input_paths):
+                pieces.append(
+                    clip_cache.acquire(
+                        path, ffmpeg_path, on_log=log, on_progress=_tracker(sum(durations[:idx])), perf=perf
+                    )
+                )
+            _concat(ffmpeg_path, pieces, ["-c", "copy", "-bsf:a", "aac_adtstoasc", "-movflags", "+faststart"], output_path, perf=perf)
+            log(f"{output_filename}: assembled from cached normalized clips (stream copy).")
+            return
+        except (RuntimeError, OSError) as e:
+            if not fallback_args:
+                raise
+            log(f"{output_filename}: clip cache encode failed ({str(e).splitlines()[-1]}); re-encoding directly.")
+        finally:
+            clip_cache.release(pieces)
+
+    encode_args = encode_args or ENCODE_ARGS
+    try:
+        _concat(ffmpeg_path, input_paths, encode_args, output_path, on_progress=_tracker(0.0), perf=perf)
+    except RuntimeError as e:
+        if not fallback_args or fallback_args == encode_args:
+            raise
+        log(f"{output_filename}: {_video_encoder(encode_args)} failed ({str(e).splitlines()[-1]}); retrying with {_video_encoder(fallback_args)}.")
+        encode_args = fallback_args
+        _concat(ffmpeg_path, input_paths, encode_args, output_path, on_progress=_tracker(0.0), perf=perf)
+    log(f"{output_filename}: re-encoded with {_video_encoder(encode_args)}.")
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import tkinter as tk
+
+# Resized animation frames are packed side by side into one PNG (a sprite
+# sheet) so startup decodes a single small image instead of resampling every
+# source frame. A JSON file next to the sheet records the cell size, frame
+# count and the key of the sources it was built from.
+
+
+def atlas_key(paths: List[Path], extra: str = "") -> str:
+    digest = hashlib.sha1(extra.encode("utf-8"))
+    for path in paths:
+        st = path.stat()
+        digest.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _meta_path(png_path: Path) -> Path:
+    return png_path.with_suffix(".json")
+
+
+def read_atlas_meta(png_path: Path) -> Optional[Dict]:
+    if not png_path.is_file():
+        return None
+    try:
+        with open(_meta_path(png_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+    if not all(k in meta for k in ("count", "cell_w", "cell_h", "fps")):
+        return None
+    return meta
+
+
+def write_atlas(images, png_path: Path, key: str, fps: float) -> Dict:
+    """Pack PIL images into a horizontal strip of equal cells (requires Pillow)."""
+    from PIL import Image
+
+    cell_w = max(img.width for img in images)
+    cell_h = max(img.height for img in images)
+    sheet = Image.new("RGBA", (cell_w * len(images), cell_h), (0, 0, 0, 0))
+    for idx, img in enumerate(images):
+        sheet.paste(img, (idx * cell_w + (cell_w - img.width) // 2, (cell_h - img.height) // 2))
+
+    png_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = png_path.with_name(png_path.name + ".tmp")
+    sheet.save(tmp, format="PNG")
+    os.replace(tmp, png_path)
+    meta = {"key": key, "count": len(images), "cell_w": cell_w, "cell_h": cell_h, "fps": fps}
+    with open(_meta_path(png_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4)
+    return meta
+
+
+def build_sequence_atlas(frame_files: List[Path], size: int, png_path: Path, fps: float) -> Dict:
+    # The key only needs file stats, so a current sheet never imports Pillow.
+    key = atlas_key(frame_files, f"sequence:{size}")
+    meta = read_atlas_meta(png_path)
+    if meta and meta.get("key") == key:
+        return meta
+    from PIL import Image
+
+    images = []
+    for frame_path in frame_files:
+        try:
+            image = Image.open(frame_path).convert("RGBA")
+        except Exception:
+            continue
+        images.append(image.resize((size, size), Image.LANCZOS))
+    if not images:
+        raise RuntimeError("No readable animation frames.")
+    return write_atlas(images, png_path, key, fps)
+
+
+def build_rotation_atlas(
+    load_image: Callable[[], object],
+    key_paths: List[Path],
+    angles: List[float],
+    size: int,
+    png_path: Path,
+    fps: float,
+) -> Dict:
+    """Sheet of the image rotated through angles, keyed by key_paths.
+
+    load_image() returns the PIL image and is only called (with Pillow
+    imported) when the cached sheet is missing or stale.
+    """
+    key = atlas_key(key_paths, f"rotation:{size}:{angles}")
+    meta = read_atlas_meta(png_path)
+    if meta and meta.get("key") == key:
+        return meta
+    from PIL import Image
+
+    image = load_image()
+    if image is None:
+        raise RuntimeError("No image to build the rotation atlas from.")
+    image = image.resize((size, size), Image.LANCZOS)
+    # Cells must fit the widest rotation (the diagonal) so every frame is centred alike.
+    cell = int(math.ceil(size * math.sqrt(2)))
+    frames = []
+    for angle in angles:
+        rotated = image.rotate(-angle, resample=Image.BICUBIC, expand=True)
+        padded = Image.new("RGBA", (cell, cell), (0, 0, 0, 0))
+        padded.paste(rotated, ((cell - rotated.width) // 2, (cell - rotated.height) // 2))
+        frames.append(padded)
+    return write_atlas(frames, png_path, key, fps)
+
+
+def load_atlas_frames(master, png_path: Path, meta: Dict) -> List[tk.PhotoImage]:
+    """Slice the sheet into PhotoImages with Tk alone (no Pillow needed)."""
+    sheet = tk.PhotoImage(master=master, file=str(png_path))
+    cell_w, cell_h = meta["cell_w"], meta["cell_h"]
+    frames = []
+    for idx in range(meta["count"]):
+        frame = tk.PhotoImage(master=master, width=cell_w, height=cell_h)
+        frame.tk.call(str(frame), "copy", str(sheet), "-from", idx * cell_w, 0, (idx + 1) * cell_w, cell_h, "-to", 0, 0)
+        frames.append(frame)
+    return frames
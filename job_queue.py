@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import base_dir
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED_STATUSES = (DONE, FAILED)
+
+
+def queue_path_from_config(config: Dict) -> Path:
+    path = Path(config.get("queue_file", "psa_jobs.json"))
+    if not path.is_absolute():
+        path = base_dir() / path
+    return path
+
+
+class JobQueue:
+    """Persistent backlog of pipeline jobs executed by a small worker pool.
+
+    Every status change is written to disk, so a crash or a closed window
+    loses nothing: jobs that were running are queued again on the next start
+    (the copy manifest and clip cache make the repeated work cheap).
+    run(payload, emit) does the work and returns True on success; on_event
+    receives (job_id, kind, value) for every message plus "status" changes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        run: Callable[[Dict, Callable[[str, object], None]], bool],
+        workers: int = 1,
+        on_event: Optional[Callable[[str, str, object], None]] = None,
+    ):
+        self.path = Path(path)
+        self.run = run
+        self.workers = max(1, workers)
+        self.on_event = on_event
+        self._cond = threading.Condition()
+        self._jobs: List[Dict] = []
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        jobs = data.get("jobs") if isinstance(data, dict) else None
+        if not isinstance(jobs, list):
+            jobs = []
+        jobs = [job for job in jobs if isinstance(job, dict) and "id" in job and "payload" in job]
+        for job in jobs:
+            if job.get("status") == RUNNING:
+                job["status"] = QUEUED
+                job["resumed"] = True
+        self._jobs = jobs
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"jobs": self._jobs}, f, indent=4)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+    def _notify(self, job_id: str, kind: str, value) -> None:
+        if self.on_event:
+            self.on_event(job_id, kind, value)
+
+    def _find(self, job_id: str) -> Optional[Dict]:
+        return next((job for job in self._jobs if job["id"] == job_id), None)
+
+    def jobs(self) -> List[Dict]:
+        with self._cond:
+            return [dict(job) for job in self._jobs]
+
+    def add(self, label: str, payload: Dict) -> str:
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "label": label,
+            "payload": payload,
+            "status": QUEUED,
+            "progress": 0.0,
+            "error": "",
+            "created": time.time(),
+        }
+        with self._cond:
+            self._jobs.append(job)
+            self._save()
+            self._cond.notify()
+        self._notify(job["id"], "status", QUEUED)
+        return job["id"]
+
+    def remove(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._find(job_id)
+            if not job or job["status"] == RUNNING:
+                return False
+            self._jobs.remove(job)
+            self._save()
+        self._notify(job_id, "status", "removed")
+        return True
+
+    def retry(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._find(job_id)
+            if not job or job["status"] != FAILED:
+                return False
+            job.update(status=QUEUED, progress=0.0, error="")
+            self._save()
+            self._cond.notify()
+        self._notify(job_id, "status", QUEUED)
+        return True
+
+    def clear_finished(self) -> None:
+        with self._cond:
+            removed = [job["id"] for job in self._jobs if job["status"] in FINISHED_STATUSES]
+            self._jobs = [job for job in self._jobs if job["status"] not in FINISHED_STATUSES]
+            self._save()
+        for job_id in removed:
+            self._notify(job_id, "status", "removed")
+
+    def start(self) -> None:
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _next_job(self) -> Optional[Dict]:
+        with self._cond:
+            while not self._stopping:
+                job = next((j for j in self._jobs if j["status"] == QUEUED), None)
+                if job:
+                    job["status"] = RUNNING
+                    job["started"] = time.time()
+                    job.pop("resumed", None)
+                    self._save()
+                    return job
+                self._cond.wait()
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job_id = job["id"]
+            self._notify(job_id, "status", RUNNING)
+            errors = []
+
+            def emit(kind, value, job=job, errors=errors):
+                if kind == "progress":
+                    job["progress"] = float(value)
+                elif kind == "error":
+                    errors.append(str(value))
+                self._notify(job["id"], kind, value)
+
+            try:
+                ok = self.run(job["payload"], emit)
+            except Exception as e:
+                errors.append(str(e))
+                self._notify(job_id, "error", str(e))
+                ok = False
+            with self._cond:
+                job["status"] = DONE if ok else FAILED
+                job["error"] = "\n".join(errors)
+                job["finished"] = time.time()
+                if ok:
+                    job["progress"] = 100.0
+                self._save()
+            self._notify(job_id, "status", job["status"])
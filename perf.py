@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+REPORT_PREFIX = "psa_perf_"
+
+
+class PerfRecorder:
+    """Thread-safe list of timed spans (name, start, seconds, attributes).
+
+    Passed explicitly to the functions that should be measured; they accept
+    perf=None and record nothing in that case.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: List[Dict] = []
+
+    def add(self, name: str, start: float, seconds: float, **attrs) -> None:
+        record = {"name": name, "start": round(start - self._origin, 4), "seconds": round(seconds, 4)}
+        record.update(attrs)
+        with self._lock:
+            self._spans.append(record)
+
+    def spans(self) -> List[Dict]:
+        with self._lock:
+            return [dict(span) for span in self._spans]
+
+    def totals(self) -> Dict[str, Dict]:
+        """Per span name: count, summed seconds and summed bytes."""
+        totals: Dict[str, Dict] = {}
+        for span in self.spans():
+            entry = totals.setdefault(span["name"], {"count": 0, "seconds": 0.0, "bytes": 0})
+            entry["count"] += 1
+            entry["seconds"] += span["seconds"]
+            entry["bytes"] += span.get("bytes", 0) or 0
+        for entry in totals.values():
+            entry["seconds"] = round(entry["seconds"], 4)
+        return totals
+
+    def report(self, **extra) -> Dict:
+        data = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "wall_seconds": round(time.perf_counter() - self._origin, 3),
+            "totals": self.totals(),
+            "spans": self.spans(),
+        }
+        data.update(extra)
+        return data
+
+    def write(self, folder: str, **extra) -> str:
+        name = f"{REPORT_PREFIX}{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}.json"
+        path = os.path.join(folder, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**extra), f, indent=4)
+        return path
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for name, entry in self.totals().items():
+            text = f"{name}: {entry['seconds']:.1f}s"
+            if entry["count"] > 1:
+                text += f" over {entry['count']}"
+            if entry["bytes"]:
+                text += f", {entry['bytes'] / (1024 * 1024):.1f} MB"
+                if entry["seconds"] > 0:
+                    text += f" ({entry['bytes'] / (1024 * 1024) / entry['seconds']:.1f} MB/s)"
+            lines.append(text)
+        return lines
+
+
+@contextmanager
+def span(perf: Optional[PerfRecorder], name: str, **attrs):
+    """Time the block as a span; the yielded dict can collect extra attributes such as bytes."""
+    if perf is None:
+        yield {}
+        return
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        attrs["failed"] = True
+        raise
+    finally:
+        perf.add(name, start, time.perf_counter() - start, **attrs)
@@ -0,0 +1,369 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from clip_cache import DEFAULT_FPS, ClipCache, cache_dir_from_config, normalize_args
+from config import config_int
+from encoder_profiles import FALLBACK_ENCODER, choose_encoder, output_args, profile_from_config, video_args
+from ffmpeg_utils import HW_ENCODERS, ensure_ffmpeg, ffmpeg_info
+from file_ops import build_folder_structure, copy_selected_files, stitch_ms_files, sweep_partials
+from perf import PerfRecorder, span
+
+# The RS copy + MS stitch pipeline, shared by the GUI and the headless CLI.
+
+
+# ---------------------------------------------------------
+# FILENAME HELPERS
+# ---------------------------------------------------------
+def build_ms_filename(date_text, initials):
+    date_part = date_text.strip()
+    initials_part = initials.strip()
+    if not date_part or not initials_part:
+        return ""
+    return f"Main_PSA_{date_part}_MS_1920x1080_H.264_{initials_part}.mp4"
+
+
+def ensure_mp4_extension(name: str) -> str:
+    if not name:
+        return ""
+    if name.lower().endswith(".mp4"):
+        return name
+    return f"{name}.mp4"
+
+
+def apply_variant_name(base_filename: str, name_token: str) -> str:
+    token = name_token.strip() or "MS"
+    if "_MS_" in base_filename:
+        return base_filename.replace("_MS_", f"_{token}_")
+    root, ext = os.path.splitext(base_filename)
+    ext = ext or ".mp4"
+    return f"{root}_{token}{ext}"
+
+
+def next_saturday_mmdd():
+    today = datetime.today()
+    days_ahead = (5 - today.weekday()) % 7
+    target = today + timedelta(days=days_ahead)
+    return target.strftime("%m%d")
+
+
+_OFF_WEEK_PATTERN = re.compile(r"\boff[\s_-]*(week|wk)s?\b", re.IGNORECASE)
+
+
+def is_off_week_folder(name: str) -> bool:
+    """Return True when the destination folder name indicates an off week."""
+    if not name:
+        return False
+    return _OFF_WEEK_PATTERN.search(name) is not None
+
+
+def resolve_dest(root_path: str, folder: str, week_text: str) -> str:
+    """Week folder for a job; raises ValueError with a user-facing message."""
+    if not root_path or not os.path.isdir(root_path):
+        raise ValueError("Destination root is invalid. Update Settings.")
+    if not folder:
+        raise ValueError("Select a destination folder inside the root.")
+    if is_off_week_folder(folder):
+        return os.path.join(root_path, folder)
+    week_text = str(week_text or "").strip()
+    if not week_text:
+        raise ValueError("Please enter a week number.")
+    try:
+        int(week_text)
+    except ValueError:
+        raise ValueError("Week must be a number.")
+    return os.path.join(root_path, folder, f"Week {week_text}")
+
+
+def build_payload(app_config: Dict, source: str, dest: str, rs_selected: List[str], ms_variants: List[Dict], base_filename: str) -> Dict:
+    return {
+        "source": source,
+        "dest": dest,
+        "rs_selected": rs_selected,
+        "ms_variants": ms_variants,
+        "base_filename": base_filename,
+        "ffmpeg_names": app_config.get("ffmpeg_names", []),
+        "ffmpeg_download_url": app_config.get("ffmpeg_download_url", ""),
+        "ffmpeg_sha256": app_config.get("ffmpeg_sha256", ""),
+        "ms_stitch_workers": config_int(app_config, "ms_stitch_workers", 2),
+        "ms_cache_dir": str(cache_dir_from_config(app_config)),
+        "ms_cache_max_mb": config_int(app_config, "ms_cache_max_mb", 10240),
+        "ms_normalize_fps": str(app_config.get("ms_normalize_fps") or DEFAULT_FPS),
+        "copy_workers": config_int(app_config, "copy_workers", 4),
+        "copy_buffer_mb": max(1, config_int(app_config, "copy_buffer_mb", 8)),
+        "copy_incremental": bool(app_config.get("copy_incremental", True)),
+        "copy_fast_hash": bool(app_config.get("copy_fast_hash", False)),
+        "copy_hardlink": bool(app_config.get("copy_hardlink", False)),
+        "copy_zero_copy": bool(app_config.get("copy_zero_copy", True)),
+        "ms_incremental": bool(app_config.get("ms_incremental", True)),
+        "encoder_profile": profile_from_config(app_config),
+        "perf_report": bool(app_config.get("perf_report", True)),
+    }
+
+
+def run_job(payload: Dict, emit: Callable[[str, object], None]) -> bool:
+    """Copy the RS selections and stitch every MS version described by payload.
+
+    emit(kind, value) receives the same messages the GUI queue handles:
+    "progress" (0-100), "activity", "log", "info" and "error". Returns False
+    when the job stopped on an error. Unless payload["perf_report"] is off,
+    phase timings are logged and saved as a JSON report in PSAs/.
+    """
+    if not payload.get("perf_report", True):
+        return _run_job(payload, emit, None)
+    perf = PerfRecorder()
+    ok = False
+    try:
+        ok = _run_job(payload, emit, perf)
+        return ok
+    finally:
+        _report_perf(payload, emit, perf, ok)
+
+
+def _report_perf(payload: Dict, emit: Callable[[str, object], None], perf: PerfRecorder, ok: bool) -> None:
+    lines = perf.summary_lines()
+    if not lines:
+        return
+    emit("log", "Timing: " + "; ".join(lines) + ".")
+    folder = os.path.join(payload["dest"], "PSAs")
+    if not os.path.isdir(folder):
+        return
+    try:
+        path = perf.write(
+            folder,
+            ok=ok,
+            rs_files=len(payload["rs_selected"]),
+            ms_versions=[variant["name"] for variant in payload["ms_variants"] if variant["order"]],
+            encoder_profile=(payload.get("encoder_profile") or {}).get("name"),
+        )
+        emit("log", f"Performance report saved: {path}")
+    except OSError as e:
+        emit("log", f"Could not save the performance report: {e}")
+
+
+def _run_job(payload: Dict, emit: Callable[[str, object], None], perf) -> bool:
+    emit("progress", 5)
+    try:
+        with span(perf, "folder build"):
+            build_folder_structure(payload["dest"])
+            removed = sweep_partials(os.path.join(payload["dest"], "PSAs"))
+    except Exception as e:
+        emit("error", f"Could not prepare destination: {e}")
+        return False
+    if removed:
+        emit("log", f"Removed {len(removed)} unfinished file(s) left by an interrupted run.")
+
+    any_work = False
+    source = payload["source"]
+    dest = payload["dest"]
+
+    try:
+        if payload["rs_selected"]:
+            any_work = True
+            emit("activity", "Copying RS clips and music")
+            emit("log", "Copying RS clips and music...")
+
+            def _copy_progress(copied, total, rate):
+                if total:
+                    emit("progress", 5 + 35 * copied / total)
+                emit("activity", f"Copying RS clips ({rate / (1024 * 1024):.1f} MB/s)")
+
+            with span(perf, "rs copy") as attrs:
+                stats = copy_selected_files(
+                    dest,
+                    payload["rs_selected"],
+                    source,
+                    max_workers=payload["copy_workers"],
+                    buffer_size=payload["copy_buffer_mb"] * 1024 * 1024,
+                    on_progress=_copy_progress,
+                    on_log=lambda msg: emit("log", msg),
+                    incremental=payload["copy_incremental"],
+                    fast_hash=payload["copy_fast_hash"],
+                    perf=perf,
+                    hardlink=payload.get("copy_hardlink", False),
+                    zero_copy=payload.get("copy_zero_copy", True),
+                )
+                attrs["bytes"] = stats["bytes"]
+                attrs["skipped_files"] = stats["skipped_files"]
+            if stats["skipped_files"]:
+                emit(
+                    "log",
+                    f"Skipped {stats['skipped_files']} unchanged files "
+                    f"({stats['skipped_bytes'] / (1024 * 1024):.1f} MB).",
+                )
+            rate = stats["bytes"] / max(stats["seconds"], 1e-6)
+            emit(
+                "log",
+                f"RS copy complete: {stats['files']} files, {stats['bytes'] / (1024 * 1024):.1f} MB "
+                f"in {stats['seconds']:.1f}s ({rate / (1024 * 1024):.1f} MB/s).",
+            )
+            emit("progress", 40)
+    except Exception as e:
+        emit("error", f"RS copy failed: {e}")
+        return False
+
+    # Keyed by output filename so duplicate version names keep the last order,
+    # as the serial loop did, instead of two encoders writing one file.
+    ms_jobs = {}
+    for variant in payload["ms_variants"]:
+        order_list = variant["order"]
+        if not order_list:
+            continue
+        name_token = variant["name"] or "MS"
+        filename = apply_variant_name(payload["base_filename"], name_token)
+        ms_jobs[filename] = (name_token, order_list, filename)
+    ms_jobs = list(ms_jobs.values())
+
+    if ms_jobs:
+        any_work = True
+        emit("activity", "Stitching MS clips")
+        download_state = {"last": 0.0}
+
+        def _report_ffmpeg_download(done, total):
+            now = time.perf_counter()
+            if now - download_state["last"] < 0.25 and done != total:
+                return
+            download_state["last"] = now
+            if total:
+                emit("activity", f"Downloading ffmpeg ({done / (1024 * 1024):.1f} of {total / (1024 * 1024):.1f} MB)")
+            else:
+                emit("activity", f"Downloading ffmpeg ({done / (1024 * 1024):.1f} MB)")
+
+        try:
+            with span(perf, "ffmpeg resolve"):
+                ffmpeg_path = ensure_ffmpeg(
+                    payload["ffmpeg_names"],
+                    payload["ffmpeg_download_url"],
+                    on_progress=_report_ffmpeg_download,
+                    expected_sha256=payload["ffmpeg_sha256"],
+                )
+        except Exception as e:
+            emit("error", f"MS stitch failed: {e}")
+            return False
+        try:
+            info = ffmpeg_info(ffmpeg_path)
+            hw = [name for name in HW_ENCODERS if name in info.get("encoders", [])]
+            emit("log", f"Using {info.get('version') or ffmpeg_path}")
+            if hw:
+                emit("log", f"Hardware encoders available: {', '.join(hw)}")
+        except Exception:
+            pass
+
+        profile = payload.get("encoder_profile") or profile_from_config({})
+        try:
+            with span(perf, "encoder check"):
+                encoder = choose_encoder(ffmpeg_path, profile, on_log=lambda msg: emit("log", msg))
+        except Exception:
+            encoder = FALLBACK_ENCODER
+        try:
+            threads = int(profile.get("threads") or 0)
+            emit(
+                "log",
+                f"Encoding profile '{profile['name']}': {encoder}, {profile.get('speed')}, quality {profile.get('quality')}"
+                + (f", {threads} threads" if threads else "")
+                + ".",
+            )
+            encode_args = output_args(encoder, profile)
+            fallback_args = output_args(FALLBACK_ENCODER, profile)
+
+            clip_cache = None
+            if payload["ms_cache_max_mb"] > 0:
+                clip_cache = ClipCache(
+                    payload["ms_cache_dir"],
+                    payload["ms_cache_max_mb"] * 1024 * 1024,
+                    encode_args=normalize_args(
+                        video_args(encoder, profile),
+                        str(profile.get("audio_bitrate", "128k")),
+                        payload.get("ms_normalize_fps") or DEFAULT_FPS,
+                    ),
+                )
+        except Exception as e:
+            emit("error", f"MS stitch failed: {e}")
+            return False
+
+        ms_start = 40 if payload["rs_selected"] else 5
+        ms_end = 95
+        progress_lock = threading.Lock()
+        variant_percent = {job[2]: 0.0 for job in ms_jobs}
+        variant_updates = {job[2]: 0 for job in ms_jobs}
+        variant_logged = {job[2]: -1 for job in ms_jobs}
+
+        def _report_variant(name_token, filename, percent, fps, speed):
+            with progress_lock:
+                variant_updates[filename] += 1
+                if percent is not None:
+                    variant_percent[filename] = percent
+                    step = int(percent // 10)
+                    should_log = step > variant_logged[filename]
+                    variant_logged[filename] = max(step, variant_logged[filename])
+                else:
+                    # No duration to measure against; log throughput every ~10s.
+                    should_log = variant_updates[filename] % 20 == 1
+                overall = sum(variant_percent.values()) / len(variant_percent)
+            emit("progress", ms_start + (ms_end - ms_start) * overall / 100)
+            if should_log:
+                details = [f"{percent:.0f}%"] if percent is not None else []
+                if fps:
+                    details.append(f"{fps:.0f} fps")
+                if speed:
+                    details.append(f"{speed:.2f}x")
+                if details:
+                    emit("log", f"MS {name_token}: {', '.join(details)}")
+
+        def _stitch_variant(name_token, order_list, filename):
+            emit("log", f"Stitching MS clips ({name_token})...")
+            with span(perf, "ms version", version=name_token, clips=len(order_list)) as attrs:
+                output_path = stitch_ms_files(
+                    dest,
+                    order_list,
+                    source,
+                    filename,
+                    ffmpeg_path,
+                    on_log=lambda msg: emit("log", msg),
+                    clip_cache=clip_cache,
+                    on_progress=lambda percent, fps, speed: _report_variant(name_token, filename, percent, fps, speed),
+                    encode_args=encode_args,
+                    fallback_args=fallback_args,
+                    perf=perf,
+                    incremental=payload.get("ms_incremental", True),
+                )
+                attrs["bytes"] = os.path.getsize(output_path)
+            return output_path
+
+        workers = max(1, min(payload["ms_stitch_workers"], len(ms_jobs)))
+        if workers > 1:
+            emit("log", f"Stitching {len(ms_jobs)} MS versions, {workers} at a time.")
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_stitch_variant, *job): job for job in ms_jobs}
+            for future in as_completed(futures):
+                name_token, _, filename = futures[future]
+                with progress_lock:
+                    variant_percent[filename] = 100.0
+                    overall = sum(variant_percent.values()) / len(variant_percent)
+                try:
+                    output_path = future.result()
+                except Exception as e:
+                    failures.append(f"{name_token}: {e}")
+                    emit("log", f"MS stitch failed ({name_token}): {e}")
+                else:
+                    emit("log", f"MS stitch complete: {output_path}")
+                emit("progress", ms_start + (ms_end - ms_start) * overall / 100)
+
+        if failures:
+            emit("error", "MS stitch failed:\n" + "\n".join(failures))
+            return False
+
+    if not any_work:
+        emit("info", "No RS or MS selections to process.")
+        return True
+
+    emit("progress", 100)
+    emit("log", "All operations complete.")
+    emit("info", "RS copy and MS stitch complete.")
+    return True
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from config import load_config
+from pipeline import (
+    build_ms_filename,
+    build_payload,
+    ensure_mp4_extension,
+    next_saturday_mmdd,
+    resolve_dest,
+    run_job,
+)
+from settings_manager import load_settings
+
+# Headless entry point: runs the same pipeline as the GUI and reports every
+# step as one JSON object per line on stdout, e.g.
+#   {"job": "north", "event": "progress", "value": 42.0, "time": 1718000000.0}
+# The last line of each job has event "done" and value {"ok": ..., "seconds": ...}.
+
+_print_lock = threading.Lock()
+
+
+def _write_event(job_name: str, kind: str, value) -> None:
+    line = json.dumps({"job": job_name, "event": kind, "value": value, "time": round(time.time(), 3)})
+    with _print_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def load_job_file(path: str) -> List[Dict]:
+    """Jobs from a JSON or YAML file: a single job, a list, or {"jobs": [...]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("YAML job files need PyYAML (pip install pyyaml); use JSON otherwise.")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict) and "jobs" in data:
+        data = data["jobs"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(job, dict) for job in data):
+        raise SystemExit(f"{path}: expected a job object, a list of jobs or {{\"jobs\": [...]}}.")
+    return data
+
+
+def _parse_ms_arg(value: str) -> Dict:
+    name, _, clips = value.rpartition("=")
+    return {"name": name.strip() or "MS", "order": [c.strip() for c in clips.split(",") if c.strip()]}
+
+
+def _normalize_ms(value) -> List[Dict]:
+    # {"MS": [...], "MS2": [...]} or [{"name": ..., "order": [...]}] or a plain clip list.
+    if isinstance(value, dict):
+        return [{"name": str(name), "order": list(order or [])} for name, order in value.items()]
+    value = list(value or [])
+    if value and all(isinstance(item, str) for item in value):
+        return [{"name": "MS", "order": value}]
+    return [{"name": str(item.get("name") or "MS"), "order": list(item.get("order") or [])} for item in value]
+
+
+def prepare_job(job: Dict, app_config: Dict, settings: Dict) -> Dict:
+    """Validate a job description and turn it into a pipeline payload."""
+    source = str(job.get("source") or settings.get("source", "")).strip()
+    if not source or not os.path.isdir(source):
+        raise ValueError(f"Source folder not found: {source or '(none)'}")
+    dest_root = str(job.get("dest_root") or settings.get("dest_root", "")).strip()
+    dest = resolve_dest(dest_root, str(job.get("folder") or "").strip(), job.get("week"))
+
+    rs_selected = [str(name) for name in job.get("rs") or []]
+    ms_variants = [v for v in _normalize_ms(job.get("ms")) if v["order"]]
+    if not rs_selected and not ms_variants:
+        raise ValueError("No RS or MS selections to process.")
+    if ms_variants and not os.path.isdir(os.path.join(source, "MS")):
+        raise ValueError("MS folder not found under source path.")
+
+    date_text = str(job.get("date") or next_saturday_mmdd())
+    suggested = build_ms_filename(date_text, str(job.get("initials") or ""))
+    base_filename = ensure_mp4_extension(str(job.get("filename") or "").strip() or suggested)
+    if ms_variants and not base_filename:
+        raise ValueError("Set initials (and optionally date), or a filename, for the MS output.")
+
+    os.makedirs(dest, exist_ok=True)
+    return build_payload(app_config, source, dest, rs_selected, ms_variants, base_filename)
+
+
+def _run_one(job: Dict, index: int, app_config: Dict, settings: Dict) -> bool:
+    name = str(job.get("name") or f"job{index + 1}")
+    started = time.perf_counter()
+    last_progress = [-1]
+
+    def emit(kind, value):
+        # Progress arrives many times a second while encoding; keep whole steps only.
+        if kind == "progress":
+            value = round(float(value), 1)
+            if int(value) == last_progress[0] and value < 100:
+                return
+            last_progress[0] = int(value)
+        _write_event(name, kind, value)
+
+    try:
+        payload = prepare_job(job, app_config, settings)
+        _write_event(name, "start", {"dest": payload["dest"]})
+        ok = run_job(payload, emit)
+    except Exception as e:
+        _write_event(name, "error", str(e))
+        ok = False
+    _write_event(name, "done", {"ok": ok, "seconds": round(time.perf_counter() - started, 2)})
+    return ok
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run PSA RS copy / MS stitch jobs without the GUI. Progress is printed as JSON lines."
+    )
+    parser.add_argument("job_files", nargs="*", help="JSON or YAML job files")
+    parser.add_argument("--jobs", type=int, default=1, help="How many jobs to run at the same time")
+    single = parser.add_argument_group("single job (instead of a job file)")
+    single.add_argument("--name", help="Label used in the output lines")
+    single.add_argument("--source", help="Source folder (default: last used in the app)")
+    single.add_argument("--dest-root", help="Destination root (default: last used in the app)")
+    single.add_argument("--folder", help="Destination folder inside the root")
+    single.add_argument("--week", help="Week number (not needed for off-week folders)")
+    single.add_argument("--rs", action="append", default=[], help="RS clip name; repeat for more")
+    single.add_argument("--ms", action="append", default=[], help="MS version as NAME=clip1,clip2; repeat for more")
+    single.add_argument("--filename", help="MS output filename (default built from --date and --initials)")
+    single.add_argument("--date", help="MMDD for the MS filename (default: next Saturday)")
+    single.add_argument("--initials", help="Initials for the MS filename")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    jobs: List[Dict] = []
+    for path in args.job_files:
+        jobs.extend(load_job_file(path))
+    if args.folder or args.rs or args.ms:
+        jobs.append(
+            {
+                "name": args.name,
+                "source": args.source,
+                "dest_root": args.dest_root,
+                "folder": args.folder,
+                "week": args.week,
+                "rs": args.rs,
+                "ms": [_parse_ms_arg(value) for value in args.ms],
+                "filename": args.filename,
+                "date": args.date,
+                "initials": args.initials,
+            }
+        )
+    if not jobs:
+        parser.error("give a job file or --folder with --rs/--ms selections")
+
+    app_config = load_config()
+    settings = load_settings(app_config)
+    workers = max(1, min(args.jobs, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda item: _run_one(item[1], item[0], app_config, settings), enumerate(jobs)))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from config import load_config  # noqa: E402
+from encoder_profiles import FALLBACK_ENCODER, output_args, profile_from_config  # noqa: E402
+from ffmpeg_utils import HW_ENCODERS, encoder_works, ffmpeg_info, find_ffmpeg_existing  # noqa: E402
+
+
+def make_synthetic_clip(ffmpeg_path: str, path: Path, seconds: int, size: str, fps: int) -> None:
+    """A test pattern with a tone, so runs are repeatable on any machine."""
+    subprocess.run(
+        [
+            ffmpeg_path, "-y", "-hide_banner", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+            "-t", str(seconds), "-pix_fmt", "yuv420p",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", str(path),
+        ],
+        check=True,
+    )
+
+
+def bench(ffmpeg_path: str, clip: Path, args, out_path: Path) -> float:
+    started = time.perf_counter()
+    subprocess.run([ffmpeg_path, "-y", "-hide_banner", "-v", "error", "-i", str(clip)] + args + [str(out_path)], check=True)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time each encoder profile on a synthetic testsrc clip.")
+    parser.add_argument("--ffmpeg", help="ffmpeg to use (default: the one the app would find)")
+    parser.add_argument("--seconds", type=int, default=20, help="Length of the synthetic clip")
+    parser.add_argument("--size", default="1920x1080", help="Frame size of the synthetic clip")
+    parser.add_argument("--fps", type=int, default=30, help="Frame rate of the synthetic clip")
+    parser.add_argument("--threads", type=int, nargs="*", default=[0], help="Thread counts to try (0 = ffmpeg default)")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    config = load_config()
+    ffmpeg_path = args.ffmpeg or find_ffmpeg_existing(config.get("ffmpeg_names", []))
+    if not ffmpeg_path:
+        raise SystemExit("ffmpeg not found; pass --ffmpeg.")
+
+    listed = ffmpeg_info(ffmpeg_path).get("encoders", [])
+    encoders = [FALLBACK_ENCODER] + [e for e in HW_ENCODERS if e in listed and encoder_works(ffmpeg_path, e)]
+    profile_names = sorted(set(config.get("encoder_profiles", {})) | {"fast turnaround", "archival"})
+    frames = args.seconds * args.fps
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "synthetic.mp4"
+        make_synthetic_clip(ffmpeg_path, clip, args.seconds, args.size, args.fps)
+        print(f"{'profile':<18} {'encoder':<12} {'threads':>7} {'seconds':>8} {'fps':>7} {'MB':>7}")
+        for name in profile_names:
+            profile = profile_from_config(dict(config, encoder_profile=name))
+            for encoder in encoders:
+                for threads in args.threads:
+                    out_path = Path(tmp) / "out.mp4"
+                    seconds = bench(ffmpeg_path, clip, output_args(encoder, dict(profile, threads=threads)), out_path)
+                    size_mb = os.path.getsize(out_path) / (1024 * 1024)
+                    row = {
+                        "profile": name,
+                        "encoder": encoder,
+                        "threads": threads,
+                        "seconds": round(seconds, 2),
+                        "fps": round(frames / seconds, 1),
+                        "size_mb": round(size_mb, 2),
+                    }
+                    results.append(row)
+                    print(f"{name:<18} {encoder:<12} {threads or 'auto':>7} {seconds:>8.2f} {row['fps']:>7.1f} {size_mb:>7.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"clip": {"seconds": args.seconds, "size": args.size, "fps": args.fps}, "results": results}, indent=4), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
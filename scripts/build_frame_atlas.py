@@ -0,0 +1,33 @@
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from frame_atlas import build_sequence_atlas  # noqa: E402
+
+FRAMES_DIR = ROOT / "animations" / "Frames" / "LoadLogoAnimimation"
+ATLAS_FILE = ROOT / "animations" / "LoadLogoAnimimation_64.png"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bake the busy animation frames into one sprite sheet.")
+    parser.add_argument("--size", type=int, default=64, help="Frame size in pixels")
+    parser.add_argument("--fps", type=float, default=24, help="Playback frame rate")
+    args = parser.parse_args()
+
+    frame_files = sorted(FRAMES_DIR.glob("*.png"))
+    if not frame_files:
+        raise SystemExit(f"No frames found in {FRAMES_DIR}")
+
+    if ATLAS_FILE.exists():
+        ATLAS_FILE.unlink()
+    meta = build_sequence_atlas(frame_files, args.size, ATLAS_FILE, args.fps)
+    print(f"Wrote {ATLAS_FILE.relative_to(ROOT)} ({meta['count']} frames, {meta['cell_w']}x{meta['cell_h']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from delta_update import apply_patch, delta_asset_name, make_patch  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build a binary patch that turns the previous release exe into the new one.")
+    parser.add_argument("old_exe", type=Path, help="Exe of the previous release")
+    parser.add_argument("new_exe", type=Path, help="Freshly built exe")
+    parser.add_argument("from_version", help="Version of the previous release, e.g. 1.4.2")
+    parser.add_argument("--out-dir", type=Path, default=ROOT / "dist", help="Where to write the patch")
+    args = parser.parse_args()
+
+    old = args.old_exe.read_bytes()
+    new = args.new_exe.read_bytes()
+    patch = make_patch(old, new)
+    out_path = args.out_dir / delta_asset_name(args.new_exe.stem, args.from_version.lstrip("v"))
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_bytes(patch)
+
+    # Round-trip before publishing so a bad patch never reaches users.
+    check_path = out_path.with_name(out_path.name + ".check")
+    apply_patch(args.old_exe, out_path, check_path)
+    check_path.unlink()
+
+    print(f"Wrote {out_path.name}: {len(patch) / 1024:.0f} KB ({len(patch) / max(len(new), 1):.1%} of the full exe)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import base_dir
+
+# kind -> (subfolder under the source root, file extension)
+INDEX_KINDS = {
+    "rs": ("", ".mov"),
+    "music": ("Music", ".wav"),
+    "ms": ("MS", ".mp4"),
+}
+
+
+def index_path_from_config(config: Dict) -> Path:
+    path = Path(config.get("source_index_file", "source_index.json"))
+    if not path.is_absolute():
+        path = base_dir() / path
+    return path
+
+
+def _scan_dir(folder: str, ext: str) -> Dict[str, Dict]:
+    entries = {}
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.name.lower().endswith(ext):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            entries[entry.name[: -len(ext)]] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return entries
+
+
+class SourceIndex:
+    """In-memory listing of the source folders, persisted to a local JSON file.
+
+    refresh() only rescans a folder when its own mtime changed (adding,
+    removing or renaming a file bumps it), so the share is touched with a
+    handful of stat calls instead of full listings.
+    """
+
+    def __init__(self, cache_path: Path):
+        self.cache_path = Path(cache_path)
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        if isinstance(data, dict):
+            self._sources = data.get("sources", {}) or {}
+
+    def _save(self) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"sources": self._sources}, f)
+            os.replace(tmp, self.cache_path)
+        except Exception:
+            pass
+
+    def refresh(self, source: str) -> Dict[str, bool]:
+        """Revalidate every folder of source; return which kinds changed.
+
+        The share is only touched outside the lock, so readers on the GUI
+        thread never wait on a slow scan.
+        """
+        with self._lock:
+            cached = dict(self._sources.get(source, {}))
+
+        updated = {}
+        changed = {}
+        for kind, (subdir, ext) in INDEX_KINDS.items():
+            folder = os.path.join(source, subdir) if subdir else source
+            previous = cached.get(kind)
+            try:
+                mtime_ns = os.stat(folder).st_mtime_ns if os.path.isdir(folder) else None
+            except OSError:
+                mtime_ns = None
+
+            if mtime_ns is None:
+                current = None
+            elif previous and previous.get("mtime_ns") == mtime_ns:
+                current = previous
+            else:
+                try:
+                    current = {"mtime_ns": mtime_ns, "entries": _scan_dir(folder, ext)}
+                except OSError:
+                    current = None
+
+            old_entries = previous["entries"] if previous else None
+            new_entries = current["entries"] if current else None
+            if old_entries != new_entries:
+                changed[kind] = True
+            if current is not previous:
+                updated[kind] = current
+
+        if updated:
+            with self._lock:
+                self._sources.setdefault(source, {}).update(updated)
+                self._save()
+        return changed
+
+    def items(self, source: str, kind: str) -> Optional[List[str]]:
+        """Sorted clip names for kind from memory, or None if the folder is missing."""
+        with self._lock:
+            record = self._sources.get(source, {}).get(kind)
+            if record is None:
+                return None
+            return sorted(record["entries"])
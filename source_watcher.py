@@ -0,0 +1,64 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+from source_index import INDEX_KINDS, SourceIndex
+
+
+class SourceWatcher:
+    """Polls the source folders' mtimes and reports added/removed clips.
+
+    Each poll is SourceIndex.refresh(), which costs a few stat calls when
+    nothing changed; a folder is only re-listed after its mtime moves.
+    Polling is used instead of inotify/ReadDirectoryChangesW because those
+    are not available in the standard library and do not work reliably on
+    SMB shares anyway.
+    """
+
+    def __init__(
+        self,
+        index: SourceIndex,
+        on_change: Callable[[str, Dict[str, Dict[str, List[str]]]], None],
+        interval: float = 5.0,
+    ):
+        self.index = index
+        self.on_change = on_change
+        self.interval = max(0.5, interval)
+        self._source: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_source(self, source: str) -> None:
+        self._source = source
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> Dict[str, Dict[str, List[str]]]:
+        source = self._source
+        if not source:
+            return {}
+        before = {kind: set(self.index.items(source, kind) or []) for kind in INDEX_KINDS}
+        changed = self.index.refresh(source)
+        diffs = {}
+        for kind in changed:
+            after = set(self.index.items(source, kind) or [])
+            diffs[kind] = {
+                "added": sorted(after - before[kind]),
+                "removed": sorted(before[kind] - after),
+            }
+        if diffs and source == self._source:
+            self.on_change(source, diffs)
+        return diffs
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                pass
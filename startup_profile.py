@@ -0,0 +1,63 @@
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import base_dir
+
+PROFILE_FILENAME = "startup_profile.json"
+
+
+class StartupProfiler:
+    """Records named startup phases and the time until the window first paints.
+
+    Disabled profilers accept every call and record nothing, so call sites
+    do not need to check whether --profile-startup was passed.
+    """
+
+    def __init__(self, enabled: bool, started: Optional[float] = None):
+        self.enabled = enabled
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def watch_first_paint(self, root) -> None:
+        if not self.enabled:
+            return
+
+        def _painted():
+            # after_idle runs once Tk has drawn the mapped window.
+            self.mark("first paint")
+            self.report()
+
+        def _on_map(_event):
+            root.unbind("<Map>")
+            root.after_idle(_painted)
+
+        root.bind("<Map>", _on_map)
+
+    def report(self, path: Optional[Path] = None) -> dict:
+        total = self._last - self.started
+        data = {
+            "time_to_first_paint_ms": round(total * 1000, 1),
+            "phases": [{"phase": name, "ms": round(seconds * 1000, 1)} for name, seconds in self.phases],
+        }
+        path = path or base_dir() / PROFILE_FILENAME
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+        except OSError:
+            pass
+        if sys.stdout is not None:
+            for name, seconds in self.phases:
+                print(f"{name:<28}{seconds * 1000:>9.1f} ms")
+            print(f"{'time to first paint':<28}{total * 1000:>9.1f} ms")
+        return data
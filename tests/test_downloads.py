@@ -0,0 +1,217 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import downloads
+
+
+class StandIn:
+    """Local HTTP server serving one payload, with switches for the failures under test."""
+
+    def __init__(self, payload: bytes, ranges: bool = True, etag: str = '"v1"'):
+        self.payload = payload
+        self.ranges = ranges
+        self.etag = etag
+        self.cuts = {}  # range start -> bytes sent before that response is cut, once
+        self.requests = []
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stand_in._serve(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/file.bin"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _serve(self, handler):
+        range_header = handler.headers.get("Range")
+        with self._lock:
+            self.requests.append(range_header)
+        size = len(self.payload)
+        start, end, status = 0, size - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d*)$", range_header or "")
+        if_range = handler.headers.get("If-Range")
+        if self.ranges and match and (if_range is None or if_range == self.etag):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                handler.send_response(416)
+                handler.send_header("Content-Range", f"bytes */{size}")
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+            status = 206
+        body = self.payload[start:end + 1]
+        with self._lock:
+            drop_after = self.cuts.pop(start, None) if start in self.cuts and self.cuts[start] < len(body) else None
+        handler.send_response(status)
+        if status == 206:
+            handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if self.etag:
+            handler.send_header("ETag", self.etag)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if drop_after is not None:
+            handler.wfile.write(body[:drop_after])
+            handler.wfile.flush()
+            handler.close_connection = True
+            return
+        handler.wfile.write(body)
+
+
+def _payload(size: int) -> bytes:
+    return os.urandom(size)
+
+
+@mock.patch("downloads.time.sleep", lambda _seconds: None)
+class DownloadResumableTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self._tmp.name) / "ffmpeg.zip"
+        self.part = self.dest.with_name(self.dest.name + downloads.PART_SUFFIX)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_dropped_connection_resumes_with_range(self):
+        payload = _payload(3 * downloads.CHUNK_SIZE)
+        with StandIn(payload) as server:
+            server.cuts[0] = downloads.CHUNK_SIZE
+            downloads.download_resumable(server.url, self.dest, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertFalse(self.part.exists())
+        self.assertEqual(server.requests, [None, f"bytes={downloads.CHUNK_SIZE}-"])
+
+    def test_existing_part_is_resumed(self):
+        payload = _payload(1000)
+        self.part.write_bytes(payload[:400])
+        with StandIn(payload) as server:
+            downloads.download_resumable(server.url, self.dest, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertEqual(server.requests, ["bytes=400-"])
+
+    def test_416_on_complete_part_starts_over(self):
+        payload = _payload(1000)
+        self.part.write_bytes(payload)
+        with StandIn(payload) as server:
+            downloads.download_resumable(server.url, self.dest, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertEqual(server.requests, ["bytes=1000-", None])
+
+    def test_checksum_mismatch_deletes_the_download(self):
+        payload = _payload(1000)
+        with StandIn(payload) as server:
+            with self.assertRaises(RuntimeError):
+                downloads.download_resumable(server.url, self.dest, expected_sha256="0" * 64, timeout=5)
+        self.assertFalse(self.dest.exists())
+        self.assertFalse(self.part.exists())
+
+    def test_matching_checksum_is_accepted(self):
+        payload = _payload(1000)
+        with StandIn(payload) as server:
+            downloads.download_resumable(
+                server.url, self.dest, expected_sha256=hashlib.sha256(payload).hexdigest(), timeout=5
+            )
+        self.assertEqual(self.dest.read_bytes(), payload)
+
+
+
+@mock.patch("downloads.time.sleep", lambda _seconds: None)
+class DownloadParallelTests(unittest.TestCase):
+    SIZE = 4 * downloads.MIN_SEGMENT
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self._tmp.name) / "PSA_Tool.new"
+        self.state = self.dest.with_name(self.dest.name + downloads.STATE_SUFFIX)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _ranges(self, server):
+        return [r for r in server.requests if r and r != "bytes=0-0"]
+
+    def test_downloads_every_segment(self):
+        payload = _payload(self.SIZE)
+        with StandIn(payload) as server:
+            downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertFalse(self.state.exists())
+        self.assertEqual(len(self._ranges(server)), 4)
+
+    def test_failed_segment_is_retried_from_where_it_stopped(self):
+        payload = _payload(self.SIZE)
+        with StandIn(payload) as server:
+            server.cuts[2 * downloads.MIN_SEGMENT] = 1000
+            downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertEqual(len(self._ranges(server)), 5)
+
+    def test_interrupted_download_resumes_from_state(self):
+        payload = _payload(self.SIZE)
+        segment = downloads.MIN_SEGMENT
+        with StandIn(payload) as server:
+            server.cuts[segment] = 300000
+            with self.assertRaises(Exception):
+                downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5, retries=0)
+            self.assertTrue(self.state.exists())
+            server.requests.clear()
+            downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        resumed = self._ranges(server)
+        self.assertEqual(len(resumed), 1)
+        start, end = map(int, resumed[0][len("bytes="):].split("-"))
+        self.assertGreater(start, segment)
+        self.assertEqual(end, 2 * segment - 1)
+
+    def test_partial_of_another_release_with_the_same_size_is_discarded(self):
+        old, new = _payload(self.SIZE), _payload(self.SIZE)
+        with StandIn(old) as server:
+            server.cuts[downloads.MIN_SEGMENT] = 300000
+            with self.assertRaises(Exception):
+                downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5, retries=0)
+            server.payload, server.etag = new, '"v2"'
+            downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), new)
+
+    def test_server_without_range_support_uses_one_connection(self):
+        payload = _payload(self.SIZE)
+        with StandIn(payload, ranges=False) as server:
+            downloads.download_parallel(server.url, self.dest, self.SIZE, connections=4, timeout=5)
+        self.assertEqual(self.dest.read_bytes(), payload)
+        self.assertEqual(server.requests, ["bytes=0-0", None])
+
+    def test_checksum_mismatch_deletes_the_download(self):
+        payload = _payload(self.SIZE)
+        with StandIn(payload) as server:
+            with self.assertRaises(RuntimeError):
+                downloads.download_parallel(
+                    server.url, self.dest, self.SIZE, connections=4, timeout=5, expected_sha256="0" * 64
+                )
+        self.assertFalse(self.dest.exists())
+        self.assertFalse(self.state.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,28 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from ui_style import COLOR_CARD
+
+CHECK_ON = "☑"
+CHECK_OFF = "☐"
+_MESSAGE_IID = "\x00message"
+
+
+def _wheel_units(event) -> int:
+    delta = 0
+    if event.num == 4:
+        delta = -120
+    elif event.num == 5:
+        delta = 120
+    else:
+        delta = -1 * int(event.delta)
+    return int(delta / 120)
+
+
 def enable_mousewheel(widget, target):
     def _on_mousewheel(event):
-        delta = 0
-        if event.num == 4:
-            delta = -120
-        elif event.num == 5:
-            delta = 120
-        else:
-            delta = -1 * int(event.delta)
-        target.yview_scroll(int(delta / 120), "units")
+        target.yview_scroll(_wheel_units(event), "units")
 
     def _bind(_):
         widget.bind_all("<MouseWheel>", _on_mousewheel)
@@ -21,3 +36,142 @@ def enable_mousewheel(widget, target):
 
     widget.bind("<Enter>", _bind)
     widget.bind("<Leave>", _unbind)
+
+
+def debounce(widget, delay_ms: int, func):
+    """Return a callback that runs func once calls have paused for delay_ms."""
+    state = {"after_id": None}
+
+    def _fire():
+        state["after_id"] = None
+        func()
+
+    def _schedule(*_):
+        if state["after_id"] is not None:
+            widget.after_cancel(state["after_id"])
+        state["after_id"] = widget.after(delay_ms, _fire)
+
+    return _schedule
+
+
+def run_in_background(widget, work, on_done, timeout_ms=None, on_timeout=None):
+    """Run work() on a daemon thread and hand its result to on_done on the Tk thread.
+
+    on_done receives (result, error). If timeout_ms passes first, on_timeout
+    runs once; a late result is still delivered when it arrives.
+    """
+    state = {"finished": False}
+
+    def _worker():
+        try:
+            result, error = work(), None
+        except Exception as e:
+            result, error = None, e
+
+        def _deliver():
+            state["finished"] = True
+            on_done(result, error)
+
+        widget.after(0, _deliver)
+
+    def _check_timeout():
+        if not state["finished"] and on_timeout:
+            on_timeout()
+
+    threading.Thread(target=_worker, daemon=True).start()
+    if timeout_ms:
+        widget.after(timeout_ms, _check_timeout)
+
+
+class CheckList:
+    """Checkbox list backed by a single ttk.Treeview.
+
+    Rows are tree items rather than widgets, so Tk only draws what is
+    visible and filtering detaches/reattaches rows instead of rebuilding
+    them. Checked state lives in the caller's ``selected`` set.
+    """
+
+    def __init__(self, parent, selected: set, on_toggle=None, height: int = 10):
+        self.selected = selected
+        self._on_toggle = on_toggle
+        self._items = []
+        self._visible = []
+
+        self.frame = tk.Frame(parent, bg=COLOR_CARD)
+        self.tree = ttk.Treeview(self.frame, show="tree", selectmode="none", height=height, style="Card.Treeview")
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.tag_configure("message", foreground="#777777")
+
+        self.tree.bind("<Button-1>", self._on_click)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+
+    def _label(self, name: str) -> str:
+        return f"{CHECK_ON if name in self.selected else CHECK_OFF}  {name}"
+
+    def _on_mousewheel(self, event):
+        self.tree.yview_scroll(_wheel_units(event), "units")
+        return "break"
+
+    def _on_click(self, event):
+        name = self.tree.identify_row(event.y)
+        if not name or name == _MESSAGE_IID:
+            return "break"
+        checked = name not in self.selected
+        if checked:
+            self.selected.add(name)
+        else:
+            self.selected.discard(name)
+        self.tree.item(name, text=self._label(name))
+        if self._on_toggle:
+            self._on_toggle(name, checked)
+        return "break"
+
+    def _clear(self) -> None:
+        # Detached rows are not children of the root, so delete by known names.
+        rows = [name for name in self._items if self.tree.exists(name)]
+        if self.tree.exists(_MESSAGE_IID):
+            rows.append(_MESSAGE_IID)
+        if rows:
+            self.tree.delete(*rows)
+
+    def set_items(self, names) -> None:
+        """Sync rows with names, touching only the rows that were added or removed."""
+        names = list(names)
+        if self.tree.exists(_MESSAGE_IID):
+            self.tree.delete(_MESSAGE_IID)
+        elif names == self._items:
+            return
+        new_set = set(names)
+        old_set = set(self._items)
+        removed = [name for name in self._items if name not in new_set and self.tree.exists(name)]
+        if removed:
+            self.tree.delete(*removed)
+        added = [name for name in names if name not in old_set]
+        for name in added:
+            self.tree.insert("", "end", iid=name, text=self._label(name))
+        self._items = names
+        self._visible = [name for name in self._visible if name in new_set] + added
+
+    def show_only(self, names) -> None:
+        names = [name for name in names if self.tree.exists(name)]
+        if names == self._visible:
+            return
+        if self._visible:
+            self.tree.detach(*self._visible)
+        for idx, name in enumerate(names):
+            self.tree.move(name, "", idx)
+        self._visible = names
+
+    def show_message(self, text: str) -> None:
+        self._clear()
+        self._items = []
+        self._visible = []
+        self.tree.insert("", "end", iid=_MESSAGE_IID, text=text, tags=("message",))
+
+    def refresh_marks(self) -> None:
+        for name in self._items:
+            self.tree.item(name, text=self._label(name))
@@ -34,4 +34,13 @@ def apply_styles(root):
     )
     style.configure("App.TEntry", fieldbackground="#1f2130", foreground=COLOR_TEXT, insertcolor=COLOR_TEXT, padding=8)
     style.configure("Card.TCheckbutton", background=COLOR_CARD, foreground=COLOR_TEXT)
+    style.configure(
+        "Card.Treeview",
+        background=COLOR_CARD,
+        fieldbackground=COLOR_CARD,
+        foreground=COLOR_TEXT,
+        borderwidth=0,
+        rowheight=24,
+    )
+    style.layout("Card.Treeview", [("Treeview.treearea", {"sticky": "nswe"})])
     return style